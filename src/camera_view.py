@@ -0,0 +1,38 @@
+from PyQt5.QtGui import QPainter
+from PyQt5.QtWidgets import QLabel
+
+# Ukuran camera label di CounterTab; frame dirender langsung ke ukuran ini
+DISPLAY_WIDTH = 640
+DISPLAY_HEIGHT = 480
+
+
+class CameraView(QLabel):
+    """
+    Camera label that paints display-ready QImages directly.
+    Frames arrive already scaled to the label size, so there is no
+    QPixmap conversion or rescale on the GUI thread.
+    """
+
+    def __init__(self, text="", parent=None):
+        super().__init__(text, parent)
+        self.image = None
+
+    def setImage(self, image):
+        if self.image is None:
+            self.setText("")
+        self.image = image
+        self.update()
+
+    def clear(self):
+        self.image = None
+        super().clear()
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.image is None:
+            return
+        painter = QPainter(self)
+        x = (self.width() - self.image.width()) // 2
+        y = (self.height() - self.image.height()) // 2
+        painter.drawImage(x, y, self.image)
+        painter.end()
@@ -1,9 +1,19 @@
 import os
+import sys
 import uuid
 
 # Define the name of the configuration file
 CONFIG_FILE = "pc_config.ini"
 
+def resource_path(relative_path):
+    """
+    Returns the path of a bundled file (model, .env): inside the PyInstaller
+    bundle when running as an exe, otherwise relative to the working directory.
+    """
+    if hasattr(sys, '_MEIPASS'):
+        return os.path.join(sys._MEIPASS, relative_path)
+    return os.path.join(os.path.abspath("."), relative_path)
+
 def get_pc_id():
     """
     Retrieves the unique PC ID from a local configuration file.
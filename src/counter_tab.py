@@ -1,19 +1,18 @@
 from datetime import datetime
-from ultralytics import YOLO
-from PyQt5.QtCore import QThread, pyqtSignal, Qt, QTimer
-from PyQt5.QtGui import QImage, QPixmap
+from PyQt5.QtCore import pyqtSignal, Qt, QTimer
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QPushButton, QComboBox, 
-    QGroupBox, QLineEdit, QMessageBox
+    QGroupBox, QLineEdit
 )
-from voice_thread import VoiceCommandThread
-from detection_thread import DetectionThread
 from config_manager import get_pc_id
+from camera_view import CameraView, DISPLAY_WIDTH, DISPLAY_HEIGHT
+import startup
 
 class CounterTab(QWidget):
     sessionFinished = pyqtSignal(dict)
     errorOccurred = pyqtSignal(str)
+    pipelineStatsUpdated = pyqtSignal(str)
     def __init__(self, parent=None):
         super().__init__(parent)
         self.mode = None
@@ -21,6 +20,8 @@ class CounterTab(QWidget):
         self.voice_thread = None
         self.latest_data = {}
         self.counting_started = False
+        self.countdown_timer = None
+        self.waiting_for_modules = False
         self.pc_id = get_pc_id() # Get the PC ID when the tab is initialized
         print(f"CounterTab initialized with PC ID: {self.pc_id}") # DEBUG PRINT
         self.init_ui()
@@ -148,8 +149,8 @@ class CounterTab(QWidget):
         return group
 
     def create_camera_label(self):
-        label = QLabel("Camera Feed")
-        label.setFixedSize(640, 480)
+        label = CameraView("Camera Feed")
+        label.setFixedSize(DISPLAY_WIDTH, DISPLAY_HEIGHT)
         label.setAlignment(Qt.AlignCenter)
         label.setStyleSheet("""
             QLabel {
@@ -221,38 +222,87 @@ class CounterTab(QWidget):
 
     def on_mode_changed(self):
         selected = self.mode_combo.currentText()
-        self.stop_camera()
+        self.cancel_countdown()
         self.stop_voice_listening()
         self.start_button.setEnabled(False)
         self.stop_button.setEnabled(False)
         self.counting_started = False
 
         if selected == "Select Mode":  # Adjust to the new text
+            self.stop_camera()
             self.info_label.setText("Please select exercise mode.")
             self.mode = None
             return
         else:
             self.mode = selected.lower()
             self.info_label.setText(f"Mode: {selected}\nReady to start. Say 'start' or click Start!")
-            self.start_camera_preview()
-            self.start_voice_listening()
-            self.start_button.setEnabled(True)
+            if self.start_camera_preview():
+                self.start_voice_listening()
+                self.start_button.setEnabled(True)
 
 
     def start_camera_preview(self):
-        if self.detection_thread:
-            self.detection_thread.stop()
-            self.detection_thread = None
-        self.detection_thread = DetectionThread(mode=self.mode)
+        """
+        Returns:
+            bool: False while the detection modules are still loading; the
+            preview then starts from on_modules_loaded.
+        """
+        # Sesi deteksi yang sudah berjalan cukup diganti mode-nya,
+        # tanpa membuka ulang kamera atau memuat ulang model
+        if self.detection_thread and self.detection_thread.isRunning():
+            self.detection_thread.set_mode(self.mode)
+            return True
+        loader = startup.module_loader()
+        if not loader.loaded.is_set():
+            # torch/ultralytics/cv2 masih di-import di background; jangan blok GUI
+            if not self.waiting_for_modules:
+                self.waiting_for_modules = True
+                loader.progress.connect(self.show_loading_progress)
+                loader.modulesLoaded.connect(self.on_modules_loaded)
+                loader.loadFailed.connect(self.show_error)
+                loader.start_once()
+            self.info_label.setText(f"Mode: {self.mode.capitalize()}\nLoading detection modules...")
+            return False
+        if loader.error:
+            self.show_error(loader.error)
+            return False
+        from detection_thread import DetectionThread
+        import detection_process
+        if detection_process.enabled():
+            # Kamera dan model berjalan di proses terpisah agar GUI tidak tersendat
+            self.detection_thread = detection_process.DetectionProcess(mode=self.mode)
+        else:
+            self.detection_thread = DetectionThread(mode=self.mode)
+        self.detection_thread.updateData.connect(self.update_info)
         self.detection_thread.updateFrame.connect(self.update_camera)
+        self.detection_thread.errorOccurred.connect(self.handle_detection_error)
+        self.detection_thread.updateStats.connect(self.update_pipeline_stats)
         self.detection_thread.start()
-        # DO NOT connect updateData here, only for preview (not counting)
+        # updateData is only emitted while counting, never during preview
+        return True
+
+    def show_loading_progress(self, percent, step):
+        if self.waiting_for_modules and self.mode:
+            self.info_label.setText(f"Mode: {self.mode.capitalize()}\n{step}... ({percent}%)")
+
+    def on_modules_loaded(self):
+        if not self.waiting_for_modules:
+            return
+        self.waiting_for_modules = False
+        if self.mode and self.start_camera_preview():
+            self.info_label.setText(
+                f"Mode: {self.mode.capitalize()}\nReady to start. Say 'start' or click Start!"
+            )
+            self.start_voice_listening()
+            self.start_button.setEnabled(True)
 
     def stop_camera(self):
+        # Label dikosongkan dulu: frame DetectionProcess ada di shared memory yang ditutup saat stop
+        self.camera_label.clear()
         if self.detection_thread:
             self.detection_thread.stop()
             self.detection_thread = None
-        self.camera_label.clear()
+        self.pipelineStatsUpdated.emit("")
 
     def start_tracking(self):
         if self.counting_started:
@@ -269,13 +319,10 @@ class CounterTab(QWidget):
         self.start_button.setEnabled(False)
         self.stop_button.setEnabled(False)  # Disable stop button during countdown
 
-        # Start detection with updateData (activate counting)
-        self.detection_thread = DetectionThread(mode=self.mode)
-        self.detection_thread.counting_started = False
-        self.detection_thread.updateData.connect(self.update_info)
-        self.detection_thread.updateFrame.connect(self.update_camera)
-        self.detection_thread.errorOccurred.connect(self.handle_detection_error)
-        self.detection_thread.start()
+        # Reuse the preview session; only restart it if it has died
+        if not self.start_camera_preview():
+            return  # Modul deteksi belum siap; tombol Start aktif lagi setelahnya
+        self.detection_thread.begin_countdown()
 
         # Initialize countdown variables
         self.countdown_time = 5  # Countdown from 5 seconds
@@ -287,6 +334,12 @@ class CounterTab(QWidget):
 
         self.countdown_timer.start(1000)  # 1 second intervals
 
+    def cancel_countdown(self):
+        if self.countdown_timer:
+            self.countdown_timer.stop()
+            self.countdown_timer = None
+        self.countdown_label.hide()
+
     def send_start_to_thread(self):
         if self.countdown_time == 1 and self.detection_thread:
             self.detection_thread.enable_start()
@@ -301,8 +354,7 @@ class CounterTab(QWidget):
         if self.countdown_time > 0:
             self.show_countdown_label(self.countdown_time)
         else:
-            self.countdown_timer.stop()
-            self.countdown_label.hide()
+            self.cancel_countdown()
             self.start_counting()
 
     def start_counting(self):
@@ -314,7 +366,8 @@ class CounterTab(QWidget):
         if not self.counting_started:
             return  # Not currently counting
         self.stop_voice_listening()
-        self.stop_camera()
+        if self.detection_thread:
+            self.detection_thread.stop_counting()
         self.start_button.setEnabled(True)
         self.stop_button.setEnabled(False)
         self.counting_started = False
@@ -326,17 +379,31 @@ class CounterTab(QWidget):
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "pc_id": self.pc_id 
         }
-        session_data.update(self.latest_data)
-        print(f"Emitting session data with PC ID: {session_data.get('pc_id')}") # DEBUG PRINT
-        self.sessionFinished.emit(session_data)
+        from exercise_counter import session_athletes
+        athletes = session_athletes(self.latest_data.get("athletes", []))
+        if len(athletes) > 1:
+            # Satu record per atlet yang terlacak selama sesi
+            for athlete in athletes:
+                record = dict(session_data)
+                record.update(athlete)
+                record["name"] = f"{name} #{athlete['track_id']}"
+                self.sessionFinished.emit(record)
+        else:
+            # Satu atlet saja (atau tidak ada yang layak disimpan): record biasa tanpa "#id"
+            session_data.update(athletes[0] if athletes else self.latest_data)
+            session_data.pop("athletes", None)
+            print(f"Emitting session data with PC ID: {session_data.get('pc_id')}") # DEBUG PRINT
+            self.sessionFinished.emit(session_data)
         self.info_label.setText("Session finished. Please select mode or start again.")
 
     def update_info(self, data):
+        if not self.counting_started and self.countdown_timer is None:
+            return  # Late update from a session that already finished
         self.latest_data = data
         if "warning" in data:
             self.show_warning(data["warning"])
-            if not self.detection_thread or not self.detection_thread.running:
-                self.stop_tracking()
+            # The session has already dropped back to preview
+            self.stop_tracking()
             return
         self.reset_info_style()
         if data["mode"] == "squat":
@@ -347,20 +414,30 @@ class CounterTab(QWidget):
             text = (f"<b>Mode:</b> Plank<br>"
                    f"<b>Plank Active Time:</b> {data['plank_active_time']} sec<br>"
                    f"<b>Total Time:</b> {data['plank_total_time']} sec")
+        if len(data.get("athletes", [])) > 1:
+            for athlete in data["athletes"]:
+                if data["mode"] == "squat":
+                    value = f"{athlete['squat_count']} squats"
+                else:
+                    value = f"{athlete['plank_active_time']} sec plank"
+                done = " (finished)" if athlete["finished"] else ""
+                text += f"<br><b>#{athlete['track_id']}:</b> {value}{done}"
         self.info_label.setText(text)
 
+    def update_pipeline_stats(self, stats):
+        self.pipelineStatsUpdated.emit(stats.get("summary", ""))
+
     def update_camera(self, q_img):
-        pixmap = QPixmap.fromImage(q_img)
-        self.camera_label.setPixmap(pixmap.scaled(
-            self.camera_label.size(), 
-            Qt.KeepAspectRatio, 
-            Qt.SmoothTransformation
-        ))
+        if self.detection_thread:
+            self.detection_thread.frame_delivered()
+        # Frame sudah berukuran label dan berformat native dari worker
+        self.camera_label.setImage(q_img)
 
     # VOICE LOGIC
     def start_voice_listening(self):
         if self.voice_thread:
             self.stop_voice_listening()
+        from voice_thread import VoiceCommandThread
         self.voice_thread = VoiceCommandThread()
         self.voice_thread.commandDetected.connect(self.handle_voice_command)
         self.voice_thread.errorOccurred.connect(self.handle_voice_error)
@@ -1,60 +1,284 @@
 import os
 import sys
+import time
+import threading
+from contextlib import contextmanager
 from dotenv import load_dotenv
 import mysql.connector
-from config_manager import get_pc_id
+from config_manager import get_pc_id, resource_path
+from history_stats import SUMMARY_FIELDS, daily_rows
+from history_sql import (
+    DAILY_SUMMARY_DDL, DAILY_AGGREGATE_SQL, history_page_sql, history_page, daily_summary_sql
+)
 
 # Load .env dari lokasi yang sesuai (baik saat dev maupun saat exe)
-if getattr(sys, 'frozen', False):
-    base_path = sys._MEIPASS
-else:
-    base_path = os.path.abspath(".")
-
-dotenv_path = os.path.join(base_path, ".env")
+dotenv_path = resource_path(".env")
 load_dotenv(dotenv_path)
 
 def get_connection():
-    """Establishes and returns a database connection."""
+    """Establishes and returns a new (unpooled) database connection."""
     return mysql.connector.connect(
         host=os.getenv("DB_HOST"),
         user=os.getenv("DB_USER"),
         password=os.getenv("DB_PASSWORD"),
-        database=os.getenv("DB_NAME")
+        database=os.getenv("DB_NAME"),
+        connection_timeout=int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
     )
 
+# Error karena isi record (nilai tidak valid, duplikat); hanya ini yang dihitung
+# sebagai percobaan gagal per record, error lain (koneksi, skema, hak akses,
+# deadlock) dicoba ulang terus
+RECORD_ERRORS = (
+    mysql.connector.errors.DataError,
+    mysql.connector.errors.IntegrityError,
+)
+
+class ConnectionPool:
+    """
+    Bounded pool of MySQL connections shared by every thread of the app.
+    Idle connections are pinged (and reconnected if needed) before reuse,
+    broken ones are replaced, and at most `size` connections are ever open.
+    """
+
+    def __init__(self, size=4, wait_timeout=10.0, ping_after=30.0, query_timeout_ms=10000):
+        self.size = size
+        self.wait_timeout = wait_timeout
+        self.ping_after = ping_after
+        self.query_timeout_ms = query_timeout_ms
+        self.idle = []   # (connection, waktu terakhir dipakai); LIFO agar yang hangat dipakai lagi
+        self.condition = threading.Condition()
+        self.open = 0
+        self.in_use = 0
+        self.created = 0
+        self.reconnects = 0
+        self.discarded = 0
+        self.acquired = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def init_session(self, conn):
+        """Applies the per-session settings; needed on every new or reconnected session."""
+        if not self.query_timeout_ms:
+            return
+        cursor = conn.cursor()
+        try:
+            # Batas waktu SELECT di sisi server (MySQL 5.7+); diabaikan jika tidak didukung
+            cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {int(self.query_timeout_ms)}")
+        except mysql.connector.Error:
+            pass
+        finally:
+            cursor.close()
+
+    def create(self):
+        conn = get_connection()
+        self.init_session(conn)
+        with self.condition:
+            self.created += 1
+        return conn
+
+    def check(self, conn, last_used):
+        """Pings a connection that sat idle for a while and reconnects it if the server dropped it."""
+        if time.monotonic() - last_used <= self.ping_after:
+            return conn
+        try:
+            conn.ping(reconnect=False)
+        except mysql.connector.Error:
+            try:
+                conn.reconnect(attempts=2, delay=0)
+            except mysql.connector.Error:
+                self.close_quietly(conn)
+                raise
+            # Session baru dari reconnect tidak membawa setting session yang lama
+            self.init_session(conn)
+            with self.condition:
+                self.reconnects += 1
+        return conn
+
+    def acquire(self):
+        """
+        Returns a healthy connection, waiting up to wait_timeout for a free one.
+        Raises:
+            mysql.connector.errors.PoolError: If none became free in time.
+        """
+        start = time.perf_counter()
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.idle or self.open < self.size,
+                                           self.wait_timeout):
+                raise mysql.connector.errors.PoolError(
+                    f"No database connection free after {self.wait_timeout}s"
+                )
+            waited = time.perf_counter() - start
+            self.in_use += 1
+            entry = self.idle.pop() if self.idle else None
+            if entry is None:
+                self.open += 1
+
+        try:
+            conn = self.create() if entry is None else self.check(*entry)
+        except Exception:
+            with self.condition:
+                self.open -= 1
+                self.in_use -= 1
+                self.condition.notify()
+            raise
+        # Hanya acquire yang berhasil yang dihitung
+        with self.condition:
+            self.acquired += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+        return conn
+
+    def release(self, conn, broken=False):
+        if not broken:
+            try:
+                # Akhiri transaksi agar koneksi berikutnya tidak membaca snapshot lama
+                conn.rollback()
+            except mysql.connector.Error:
+                broken = True
+        with self.condition:
+            self.in_use -= 1
+            if broken:
+                self.open -= 1
+                self.discarded += 1
+            else:
+                self.idle.append((conn, time.monotonic()))
+            self.condition.notify()
+        if broken:
+            self.close_quietly(conn)
+
+    @staticmethod
+    def close_quietly(conn):
+        try:
+            conn.close()
+        except mysql.connector.Error:
+            pass
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        broken = False
+        try:
+            yield conn
+        except (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError):
+            broken = True
+            raise
+        finally:
+            self.release(conn, broken)
+
+    def stats(self):
+        with self.condition:
+            return {
+                "size": self.size,
+                "open": self.open,
+                "in_use": self.in_use,
+                "idle": len(self.idle),
+                "created": self.created,
+                "reconnects": self.reconnects,
+                "discarded": self.discarded,
+                "acquired": self.acquired,
+                "wait_avg_ms": round(self.wait_total / self.acquired * 1000, 2) if self.acquired else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 2),
+            }
+
+    def close(self):
+        with self.condition:
+            idle, self.idle = self.idle, []
+            self.open -= len(idle)
+        for conn, _ in idle:
+            self.close_quietly(conn)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Returns the process-wide pool, created on first use (no connection at import)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ConnectionPool(
+                size=int(os.getenv("DB_POOL_SIZE", "4")),
+                wait_timeout=float(os.getenv("DB_POOL_WAIT", "10")),
+                query_timeout_ms=int(os.getenv("DB_QUERY_TIMEOUT_MS", "10000"))
+            )
+        return _pool
+
+def pool_stats():
+    """Wait time, in-use and created counters of the connection pool."""
+    return get_pool().stats()
+
+def close_pool():
+    """Closes idle pooled connections, e.g. when the app exits."""
+    if _pool is not None:
+        print(f"DB: Connection pool stats: {_pool.stats()}")
+        _pool.close()
+
+INSERT_HISTORY_SQL = """
+    INSERT INTO history
+    (name, mode, squat_count, squat_duration, plank_active_time, plank_total_time, timestamp, pc_id)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+"""
+
+def history_row(record):
+    """Maps a history record dict to the parameter tuple of INSERT_HISTORY_SQL."""
+    return (
+        record.get("name"),
+        record.get("mode"),
+        record.get("squat_count", 0),
+        record.get("squat_duration", 0),
+        record.get("plank_active_time", 0),
+        record.get("plank_total_time", 0),
+        record.get("timestamp"),
+        record.get("pc_id")
+    )
+
+UPSERT_DAILY_SQL = """
+    INSERT INTO history_daily
+    (pc_id, day, mode, sessions, total_squats, squat_duration, plank_active_time,
+     plank_total_time, best_squat_count, best_plank_active_time)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        sessions = sessions + VALUES(sessions),
+        total_squats = total_squats + VALUES(total_squats),
+        squat_duration = squat_duration + VALUES(squat_duration),
+        plank_active_time = plank_active_time + VALUES(plank_active_time),
+        plank_total_time = plank_total_time + VALUES(plank_total_time),
+        best_squat_count = GREATEST(best_squat_count, VALUES(best_squat_count)),
+        best_plank_active_time = GREATEST(best_plank_active_time, VALUES(best_plank_active_time))
+"""
+
+def insert_history_batch(records):
+    """
+    Inserts several history records in one transaction.
+    Unlike insert_history, errors are raised (after rollback) so the caller
+    can keep the records and retry.
+    Args:
+        records (list): History record dicts.
+    """
+    with get_pool().connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.executemany(INSERT_HISTORY_SQL, [history_row(record) for record in records])
+            # Ringkasan harian ikut diperbarui dalam transaksi yang sama
+            cursor.executemany(UPSERT_DAILY_SQL, [
+                (row["pc_id"], row["day"], row["mode"], *(row[f] for f in SUMMARY_FIELDS))
+                for row in daily_rows(records) if row["pc_id"] and row["mode"] and row["day"]
+            ])
+            conn.commit()
+        finally:
+            cursor.close()
+
 def insert_history(record):
     """
     Inserts a new history record into the database, including the PC ID.
     Args:
         record (dict): A dictionary containing the history data.
     """
-    conn = get_connection()
-    cursor = conn.cursor()
-    sql = """
-        INSERT INTO history
-        (name, mode, squat_count, squat_duration, plank_active_time, plank_total_time, timestamp, pc_id)
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-    """
     try:
         print(f"DB: Attempting to insert record with pc_id: {record.get('pc_id')}") # DEBUG PRINT
-        cursor.execute(sql, (
-            record.get("name"),
-            record.get("mode"),
-            record.get("squat_count", 0),
-            record.get("squat_duration", 0),
-            record.get("plank_active_time", 0),
-            record.get("plank_total_time", 0),
-            record.get("timestamp"),
-            record.get("pc_id")
-        ))
-        conn.commit()
+        insert_history_batch([record])
         print("DB: Insert successful.") # DEBUG PRINT
     except mysql.connector.Error as err:
         print(f"DB: Error inserting history: {err}") # DEBUG PRINT
-        conn.rollback()
-    finally:
-        cursor.close()
-        conn.close()
 
 def fetch_all_history():
     """
@@ -62,19 +286,206 @@ def fetch_all_history():
     Returns:
         list: A list of dictionaries, each representing a history record.
     """
-    conn = get_connection()
-    cursor = conn.cursor(dictionary=True)
     current_pc_id = get_pc_id() # Get the current PC's ID
 
     # Filter by pc_id
     sql = "SELECT * FROM history WHERE pc_id = %s ORDER BY timestamp DESC"
     try:
-        cursor.execute(sql, (current_pc_id,))
-        results = cursor.fetchall()
+        with get_pool().connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(sql, (current_pc_id,))
+                results = cursor.fetchall()
+            finally:
+                cursor.close()
     except mysql.connector.Error as err:
         print(f"Error fetching history: {err}")
         results = []
-    finally:
-        cursor.close()
-        conn.close()
     return results
+
+HISTORY_INDEXES = {
+    "idx_history_pc_time": "(pc_id, timestamp, id)",
+    "idx_history_pc_mode_time": "(pc_id, mode, timestamp, id)",
+    # fetch_history_since: sinkronisasi mirror per id, tanpa filesort
+    "idx_history_pc_id": "(pc_id, id)",
+}
+
+def ensure_schema():
+    """
+    Creates the history table if needed and adds the indexes used by
+    fetch_history. Safe to run repeatedly.
+    """
+    with get_pool().connection() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS history (
+                    id INT AUTO_INCREMENT PRIMARY KEY,
+                    name VARCHAR(100),
+                    mode VARCHAR(20),
+                    squat_count INT DEFAULT 0,
+                    squat_duration INT DEFAULT 0,
+                    plank_active_time INT DEFAULT 0,
+                    plank_total_time INT DEFAULT 0,
+                    timestamp DATETIME,
+                    pc_id VARCHAR(64)
+                )
+            """)
+            cursor.execute("""
+                SELECT COUNT(*) FROM information_schema.columns
+                WHERE table_schema = DATABASE() AND table_name = 'history' AND column_name = 'id'
+            """)
+            if cursor.fetchone()[0] == 0:
+                cursor.execute("""
+                    SELECT COUNT(*) FROM information_schema.table_constraints
+                    WHERE table_schema = DATABASE() AND table_name = 'history'
+                    AND constraint_type = 'PRIMARY KEY'
+                """)
+                # Keyset pagination butuh kolom unik yang urut; primary key lama
+                # (kalau ada) dibiarkan, id cukup UNIQUE
+                key = "UNIQUE" if cursor.fetchone()[0] else "PRIMARY KEY"
+                cursor.execute(f"ALTER TABLE history ADD COLUMN id INT AUTO_INCREMENT {key} FIRST")
+            cursor.execute("""
+                SELECT DISTINCT index_name FROM information_schema.statistics
+                WHERE table_schema = DATABASE() AND table_name = 'history'
+            """)
+            existing = {row[0] for row in cursor.fetchall()}
+            for index_name, columns in HISTORY_INDEXES.items():
+                if index_name not in existing:
+                    print(f"DB: Creating index {index_name}")
+                    cursor.execute(f"CREATE INDEX {index_name} ON history {columns}")
+            cursor.execute(DAILY_SUMMARY_DDL)
+            cursor.execute("SELECT COUNT(*) FROM history_daily")
+            summary_empty = cursor.fetchone()[0] == 0
+            conn.commit()
+        finally:
+            cursor.close()
+    if summary_empty:
+        rebuild_daily_summary()
+
+def rebuild_daily_summary():
+    """
+    Recomputes history_daily from the history table, e.g. the first time it
+    is created or after history rows were edited by hand.
+    """
+    print("DB: Rebuilding daily history summary")
+    columns = ", ".join(SUMMARY_FIELDS)
+    updates = ", ".join(f"{field} = VALUES({field})" for field in SUMMARY_FIELDS)
+    aggregate = DAILY_AGGREGATE_SQL.format(
+        where="pc_id IS NOT NULL AND mode IS NOT NULL AND timestamp IS NOT NULL"
+    )
+    with get_pool().connection() as conn:
+        cursor = conn.cursor()
+        try:
+            # Ditimpa (bukan ditambah), jadi aman dijalankan ulang
+            cursor.execute(f"""
+                INSERT INTO history_daily (pc_id, day, mode, {columns})
+                SELECT * FROM ({aggregate}) AS daily
+                ON DUPLICATE KEY UPDATE {updates}
+            """)
+            conn.commit()
+        finally:
+            cursor.close()
+
+def fetch_history(mode=None, date_from=None, date_to=None, name=None,
+                  limit=200, after=None, pc_id=None, sort="timestamp", descending=True):
+    """
+    Fetches one page of this PC's history, filtered and sorted in SQL.
+    Pages are keyset-based on (sort value, id), so every page costs the same
+    regardless of how deep it is. The timestamp sort (the default) is served
+    by the history indexes; other sort keys need a sort on the server.
+    Args:
+        limit (int): Maximum rows per page.
+        after (tuple): Cursor returned with the previous page, or None.
+        pc_id (str): Defaults to the current PC.
+        sort (str): One of history_sql.HISTORY_SORT_KEYS.
+        descending (bool): Newest / largest first.
+    Returns:
+        tuple: (rows, cursor) where cursor is None on the last page.
+    """
+    sql, params = history_page_sql(
+        pc_id or get_pc_id(), mode, date_from, date_to, name, limit, after, sort, descending
+    )
+    try:
+        with get_pool().connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(sql, params)
+                rows = cursor.fetchall()
+            finally:
+                cursor.close()
+    except mysql.connector.Error as err:
+        print(f"Error fetching history: {err}")
+        return [], None
+    return history_page(rows, limit)
+
+def fetch_history_watermark():
+    """
+    Returns:
+        int: Highest history id in the table (0 if empty); a cheap primary
+        key lookup used as the starting point of fetch_history_since.
+    """
+    try:
+        with get_pool().connection() as conn:
+            cursor = conn.cursor()
+            try:
+                cursor.execute("SELECT MAX(id) FROM history")
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+    except mysql.connector.Error as err:
+        print(f"Error fetching history watermark: {err}")
+        return None
+    return int(row[0] or 0) if row else 0
+
+def fetch_history_since(after_id, pc_id=None, limit=500):
+    """
+    Fetches this PC's rows inserted after a known id, oldest first.
+    The id (not the timestamp) is the watermark, so sessions that were
+    spooled offline and written later with an older timestamp are not missed.
+    Returns:
+        list: Row dicts; fewer than limit once caught up.
+    """
+    sql = "SELECT * FROM history WHERE id > %s AND pc_id = %s ORDER BY id LIMIT %s"
+    try:
+        with get_pool().connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(sql, (after_id, pc_id or get_pc_id(), limit))
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+    except mysql.connector.Error as err:
+        print(f"Error fetching new history: {err}")
+        return []
+
+def fetch_daily_summary(mode=None, date_from=None, date_to=None, name=None, pc_id=None):
+    """
+    Returns the per-day summary rows of this PC for a filter, the input of
+    history_stats.summarize(). Without a name filter this reads only the
+    history_daily table (one row per day and mode); a name filter is not
+    covered by the summary, so those days are aggregated from history.
+    Returns:
+        list: Dicts with day, mode and the history_stats.SUMMARY_FIELDS.
+    """
+    sql, params = daily_summary_sql(pc_id or get_pc_id(), mode, date_from, date_to, name)
+    try:
+        with get_pool().connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+    except mysql.connector.Error as err:
+        print(f"Error fetching history summary: {err}")
+        return []
+
+if __name__ == "__main__":
+    # python src/db.py --setup : buat tabel dan index history
+    if "--setup" in sys.argv:
+        ensure_schema()
+        print("DB: Schema ready.")
+    # python src/db.py --rebuild-summary : hitung ulang history_daily
+    if "--rebuild-summary" in sys.argv:
+        rebuild_daily_summary()
@@ -0,0 +1,303 @@
+"""
+Capture and pose inference in a child process.
+
+With DETECTION_PROCESS=1 the counter tab uses DetectionProcess instead of
+DetectionThread. The child process runs the normal DetectionThread loop
+(camera, model, post-processing, counting, rendering), so none of it holds
+the GUI process's GIL. Rendered frames are written straight into a shared
+memory pool of display-sized BGRA slots; only the slot number and the small
+data/stats dicts go through the queues. If the child crashes it is started
+again, up to max_restarts times.
+"""
+import os
+import queue
+import logging
+import threading
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from PyQt5.QtCore import QThread, QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QImage
+from frame_delivery import FrameMailbox, DISPLAY_WIDTH, DISPLAY_HEIGHT, display_interval_ms
+from pipeline_metrics import create_metrics
+
+FRAME_SLOTS = 4
+RESTART_WARNING = "Detection process restarted! Stopping exercise."
+
+
+def enabled():
+    return os.getenv("DETECTION_PROCESS", "0").strip().lower() in ("1", "true", "on", "yes")
+
+
+def frame_pool(shm, slots):
+    return np.ndarray((slots, DISPLAY_HEIGHT, DISPLAY_WIDTH, 4), dtype=np.uint8, buffer=shm.buf)
+
+
+def run_worker(mode, spec, shm_name, slots, held, commands, events):
+    """
+    Entry point of the child process.
+    Args:
+        held (list): Slots the GUI still shows from a previous worker.
+        commands: Queue of (command, value) from the GUI process.
+        events: Queue of (kind, value) back to the GUI process.
+    """
+    logging.basicConfig(level=logging.INFO)
+    from PyQt5.QtCore import QCoreApplication
+    from detection_thread import DetectionThread
+    from frame_delivery import FrameRenderer
+    from frame_source import open_source
+
+    app = QCoreApplication([])
+    # Resource tracker dipakai bersama proses GUI, yang juga menghapus segmen ini
+    shm = shared_memory.SharedMemory(name=shm_name)
+    renderer = FrameRenderer(buffers=frame_pool(shm, slots))
+    held = set(held)
+    lock = threading.Lock()
+
+    worker = DetectionThread(mode=mode, source=open_source(spec))
+    worker.updateData.connect(lambda data: events.put(("data", data)))
+    worker.errorOccurred.connect(lambda message: events.put(("error", message)))
+    worker.updateStats.connect(lambda stats: events.put(("stats", stats)))
+
+    def emit_frame(frame):
+        with lock:
+            busy = set(held)
+        if len(busy) >= slots:
+            return  # GUI masih memegang semua slot; frame ini tidak ditampilkan
+        slot, _ = renderer.render(frame, busy)
+        with lock:
+            held.add(slot)
+        events.put(("frame", slot))
+
+    def relay_commands():
+        while True:
+            command, value = commands.get()
+            if command == "release":
+                with lock:
+                    held.discard(value)
+            elif command == "stop":
+                worker.running = False
+                return
+            else:
+                worker.commands.put((command, value))
+
+    worker.emit_frame = emit_frame
+    threading.Thread(target=relay_commands, name="detection-commands", daemon=True).start()
+    worker.run()
+    del app
+
+
+class DetectionProcess(QThread):
+    """
+    Qt-side proxy with the same signals and control methods as
+    DetectionThread. Its thread only forwards events from the child process
+    and hands shared-memory frames to the GUI through a FrameMailbox.
+    """
+    updateData = pyqtSignal(dict)
+    updateFrame = pyqtSignal(QImage)
+    errorOccurred = pyqtSignal(str)
+    updateStats = pyqtSignal(dict)
+
+    def __init__(self, mode="squat", source="0", parent=None, max_restarts=3, slots=FRAME_SLOTS):
+        super().__init__(parent)
+        self.mode = mode
+        self.source = source
+        self.max_restarts = max_restarts
+        self.slots = slots
+        self.running = False
+        self.counting = False
+        self.restarts = 0
+        self.last_data = {}
+        self.context = multiprocessing.get_context("spawn")
+        self.process = None
+        self.lock = threading.Lock()
+        self.commands = self.context.Queue()
+        self.events = self.context.Queue()
+
+        self.shm = shared_memory.SharedMemory(
+            create=True, size=slots * DISPLAY_HEIGHT * DISPLAY_WIDTH * 4
+        )
+        self.frames = frame_pool(self.shm, slots)
+        self.images = [
+            QImage(frame.data, DISPLAY_WIDTH, DISPLAY_HEIGHT, DISPLAY_WIDTH * 4, QImage.Format_RGB32)
+            for frame in self.frames
+        ]
+        self.outstanding = set()   # Slot yang sedang dipegang GUI
+        self.frame_mailbox = FrameMailbox()
+        # Tahap "delivery" terjadi di proses ini, jadi diukur di sini, bukan di proses anak
+        self.metrics = create_metrics()
+        self.frame_received_at = None
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setTimerType(Qt.PreciseTimer)
+        self.frame_timer.setInterval(display_interval_ms())
+        self.frame_timer.timeout.connect(self.deliver_frame)
+        self.started.connect(self.frame_timer.start)
+        self.finished.connect(self.frame_timer.stop)
+
+    def send(self, command, value=None):
+        with self.lock:
+            self.commands.put((command, value))
+
+    def set_mode(self, mode):
+        self.mode = mode
+        self.counting = False
+        self.send("mode", mode)
+
+    def begin_countdown(self):
+        self.counting = False
+        self.send("countdown")
+
+    def enable_start(self):
+        self.counting = True
+        self.last_data = {}
+        self.send("start")
+
+    def stop_counting(self):
+        self.counting = False
+        self.send("preview")
+
+    def frame_delivered(self):
+        """Called by the GUI slot that receives updateFrame to time delivery from the worker."""
+        if self.frame_received_at is not None:
+            self.metrics.record("delivery", self.frame_received_at)
+
+    def start_process(self):
+        with self.lock:
+            held = sorted(self.outstanding)
+            self.process = self.context.Process(
+                target=run_worker,
+                args=(self.mode, self.source, self.shm.name, self.slots, held,
+                      self.commands, self.events),
+                name="detection-worker",
+                daemon=True,
+            )
+            self.process.start()
+
+    def restart_process(self):
+        """Starts a fresh worker in preview mode after a crash."""
+        self.restarts += 1
+        logging.warning(f"Detection process exited with code {self.process.exitcode}, "
+                        f"restarting ({self.restarts}/{self.max_restarts})")
+        with self.lock:
+            # Perintah yang belum terbaca ikut hilang bersama proses lama
+            self.commands = self.context.Queue()
+            self.events = self.context.Queue()
+        if self.counting:
+            # Hitungan terakhir tetap dikirim agar sesi yang terputus masih tersimpan
+            self.counting = False
+            self.updateData.emit(dict(self.last_data, mode=self.mode, warning=RESTART_WARNING))
+        self.start_process()
+
+    def run(self):
+        self.running = True
+        self.start_process()
+        try:
+            while True:
+                try:
+                    kind, value = self.events.get(timeout=0.1)
+                    self.handle_event(kind, value)
+                except queue.Empty:
+                    pass
+                self.release_free_slots()
+                if self.process.is_alive():
+                    continue
+                # Event terakhir (mis. hitungan akhir video) bisa masih di antrian
+                self.drain_events()
+                if not self.running or self.process.exitcode == 0:
+                    break  # Dihentikan, atau sumber video sudah habis
+                if self.restarts >= self.max_restarts:
+                    self.errorOccurred.emit(
+                        f"Detection process crashed (exit code {self.process.exitcode})"
+                    )
+                    break
+                self.restart_process()
+        finally:
+            self.stop_process()
+
+    def drain_events(self):
+        """Handles the events an exited worker left in the queue."""
+        while True:
+            try:
+                kind, value = self.events.get(timeout=0.05)
+            except queue.Empty:
+                return
+            self.handle_event(kind, value)
+
+    def handle_event(self, kind, value):
+        if kind == "frame":
+            with self.lock:
+                self.outstanding.add(value)
+            self.frame_received_at = self.metrics.now()
+            self.frame_mailbox.post(value, self.images[value])
+        elif kind == "data":
+            self.last_data = value
+            if "warning" in value:
+                self.counting = False
+            self.updateData.emit(value)
+        elif kind == "error":
+            self.errorOccurred.emit(value)
+        elif kind == "stats":
+            self.updateStats.emit(self.merge_stats(value))
+
+    def merge_stats(self, stats):
+        """
+        Replaces the display part of the worker's stats with this process's:
+        the worker's own mailbox is unused, frames are handed over here.
+        """
+        stats["display"] = self.frame_mailbox.stats()
+        delivery = self.metrics.snapshot()["stages"].get("delivery")
+        if delivery:
+            stats.setdefault("stages", {})["delivery"] = delivery
+        stats["summary"] = self.metrics.summary_text(stats)
+        if stats["summary"]:
+            stats["summary"] += f" | coalesced {stats['display']['coalesced']}"
+        return stats
+
+    def release_free_slots(self):
+        """Returns slots that are neither pending nor on screen to the worker."""
+        busy = self.frame_mailbox.busy_slots()
+        with self.lock:
+            free = self.outstanding - busy
+            self.outstanding -= free
+            for slot in free:
+                self.commands.put(("release", slot))
+
+    def deliver_frame(self):
+        q_img = self.frame_mailbox.take()
+        if q_img is not None:
+            self.updateFrame.emit(q_img)
+
+    def stop_process(self):
+        if self.process is None:
+            return
+        if self.process.is_alive():
+            self.send("stop")
+            self.process.join(3)
+        if self.process.is_alive():
+            logging.warning("Detection process did not stop in time, terminating")
+            self.process.terminate()
+            self.process.join(1)
+
+    def stop(self):
+        self.running = False
+        self.send("stop")
+        self.wait(5000)
+        self.release_shared_memory()
+
+    def release_shared_memory(self):
+        """
+        Closes and unlinks the frame pool. The caller must no longer show
+        any frame from this process (CounterTab clears its label first).
+        """
+        # QImage dan view numpy memakai memori segmen, jadi dilepas sebelum close()
+        self.frame_mailbox = FrameMailbox()
+        self.images = []
+        self.frames = None
+        try:
+            self.shm.close()
+        except BufferError:
+            logging.warning("Detection frame memory is still referenced; leaving it mapped")
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
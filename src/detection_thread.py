@@ -1,227 +1,405 @@
 import time
 import cv2
 import os
-import sys
 import logging
-from datetime import datetime
-from ultralytics import YOLO
-from PyQt5.QtCore import QThread, pyqtSignal
+import queue
+import threading
+from PyQt5.QtCore import QThread, QTimer, Qt, pyqtSignal
 from PyQt5.QtGui import QImage
-
-def resource_path(relative_path):
-    if hasattr(sys, '_MEIPASS'):
-        return os.path.join(sys._MEIPASS, relative_path)
-    return os.path.join(os.path.abspath("."), relative_path)
+import inference_backends
+from frame_capture import LatestFrameBuffer, CaptureThread
+from frame_source import CameraSource
+import pose_postprocess
+from inference_scheduler import AdaptiveScheduler, DEFAULT_IMGSZ_LEVELS
+from pipeline_metrics import create_metrics
+from exercise_counter import ExerciseCounter, MultiPersonCounter
+from pose_log import PoseRecorder
+from keypoint_tracker import KeypointTracker
+from person_roi import PersonROI
+from person_tracker import PersonTracker
+from frame_delivery import FrameRenderer, FrameMailbox, display_interval_ms
 
 class DetectionThread(QThread):
     updateData = pyqtSignal(dict)
     updateFrame = pyqtSignal(QImage)
     errorOccurred = pyqtSignal(str)
+    # Ringkasan latency per tahap dan FPS, dikirim sekitar sekali per detik
+    updateStats = pyqtSignal(dict)
+
+    # Fase sesi deteksi: satu kamera dan satu model dipakai dari preview sampai counting
+    PREVIEW = "preview"
+    COUNTDOWN = "countdown"
+    COUNTING = "counting"
 
-    def __init__(self, mode="squat", parent=None):
+    def __init__(self, mode="squat", source=None, parent=None):
         super().__init__(parent)
         self.mode = mode
+        # Default: webcam; bisa juga file video, folder gambar, atau frame sintetis
+        self.source = source or CameraSource(0)
+        # False = tidak mengirim updateFrame (mis. untuk memproses rekaman massal)
+        self.emit_frames = True
         self.running = False
         self.threshold = 0.5
-        self.model = self.load_model()
-        self.ready_to_start = False
-        # Inisialisasi awal untuk memastikan nilai default
-        self.squat_start_time = 0.0
-        self.plank_start_time = 0.0
-        self.last_plank_detection_time = 0.0
-        self.squat_count = 0 # Inisialisasi squat_count di sini
+        # Model diambil dari registry di run(), bukan di GUI thread,
+        # kecuali backend sudah diisi sebelum start (mis. model sendiri per thread)
+        self.backend = None
+        self.model = None
+        self.phase = self.PREVIEW
+        # Perintah dari GUI thread diproses di awal setiap frame oleh run()
+        self.commands = queue.Queue()
+        # Logika hitung squat/plank ada di exercise_counter (tanpa Qt)
+        self.counter = ExerciseCounter(mode)
+        self.frame_buffer = None
+        self.last_detection = None
+        self.last_raw_detection = None
+        # Jika POSE_LOG_DIR diisi, deteksi per frame selama latihan direkam ke disk
+        self.pose_log_dir = os.getenv("POSE_LOG_DIR")
+        self.recorder = None
+        # KEYPOINT_TRACKING_INTERVAL=N: model tiap N frame, di antaranya optical flow
+        interval = int(os.getenv("KEYPOINT_TRACKING_INTERVAL", "0") or 0)
+        self.tracker = KeypointTracker(interval) if interval > 1 else None
+        # PERSON_ROI=1: inferensi hanya di sekitar box sebelumnya dengan imgsz lebih kecil
+        self.roi = None
+        if os.getenv("PERSON_ROI", "0").strip().lower() in ("1", "true", "on", "yes"):
+            self.roi = PersonROI(imgsz=int(os.getenv("ROI_IMGSZ", "320")))
+        self.results_offset = (0, 0)
+        self.fresh_results = False
+        # MAX_ATHLETES>1: setiap orang di frame diberi track id dan dihitung sendiri
+        max_athletes = int(os.getenv("MAX_ATHLETES", "1") or 1)
+        self.people = None
+        if max_athletes > 1:
+            self.people = PersonTracker(max_tracks=max_athletes)
+            self.counter = MultiPersonCounter(mode)
+            if self.tracker is not None or self.roi is not None:
+                logging.info("Keypoint tracking and person ROI follow a single person; "
+                             "disabled because MAX_ATHLETES > 1")
+            self.tracker = None
+            self.roi = None
+        # Hanya sumber realtime yang memakai AdaptiveScheduler; sumber offline
+        # memproses setiap frame dengan imgsz tetap
+        self.scheduler = None
+        self.imgsz = DEFAULT_IMGSZ_LEVELS[0]
+        self.metrics = create_metrics()
+        self.frame_emitted_at = None
+        self.renderer = None
+        # Worker menaruh frame terbaru di mailbox; timer di GUI thread mengambilnya
+        # sesuai refresh rate layar, frame yang belum terkirim diganti (coalesced)
+        self.frame_mailbox = FrameMailbox()
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setTimerType(Qt.PreciseTimer)
+        self.frame_timer.setInterval(display_interval_ms())
+        self.frame_timer.timeout.connect(self.deliver_frame)
+        self.started.connect(self.frame_timer.start)
+        self.finished.connect(self.frame_timer.stop)
 
     def load_model(self):
         try:
-            model_path = resource_path(os.path.join("models", "best_yolov8new.pt"))
-            return YOLO(model_path)
+            if self.backend is None:
+                self.backend = inference_backends.get_backend()
+            return self.backend.model
         except Exception as e:
             self.errorOccurred.emit(f"Failed to load model: {str(e)}")
             return None
-        
+
+    @property
+    def ready_to_start(self):
+        return self.phase == self.COUNTING
+
+    def set_mode(self, mode):
+        """Switches exercise mode without reopening the camera. Returns to preview."""
+        self.commands.put(("mode", mode))
+
+    def begin_countdown(self):
+        """Dipanggil saat tombol Start ditekan, sebelum hitungan mundur dimulai."""
+        self.commands.put(("countdown", None))
+
     def enable_start(self):
         """Dipanggil setelah hitungan mundur selesai untuk memulai penghitungan."""
-        self.ready_to_start = True
-        self.squat_start_time = time.time() # Reset waktu mulai squat
-        self.plank_start_time = time.time() # Reset waktu mulai plank
-        self.last_plank_detection_time = time.time() # Reset waktu deteksi plank terakhir
-        self.squat_count = 0 # Reset hitungan squat
-        logging.info(f"Exercise started. Squat start time: {self.squat_start_time}, Plank start time: {self.plank_start_time}")
+        self.commands.put(("start", None))
+
+    def stop_counting(self):
+        """Ends the current exercise and keeps the camera preview running."""
+        self.commands.put(("preview", None))
+
+    def process_commands(self, current_time):
+        while True:
+            try:
+                command, value = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            if command == "mode":
+                self.mode = value
+                self.finish_counting()
+                self.counter.mode = value
+                self.counter.reset()
+                self.reset_tracking()
+            elif command == "countdown":
+                self.finish_counting()
+                self.phase = self.COUNTDOWN
+                self.counter.reset()
+                self.reset_tracking()
+            elif command == "start":
+                self.phase = self.COUNTING
+                # Metrics per sesi latihan: dimulai dari nol setiap kali counting mulai
+                self.metrics.reset()
+                self.counter.start(current_time)
+                self.start_recording()
+                logging.info(f"Exercise started at {current_time}")
+            elif command == "preview":
+                self.finish_counting()
+
+    def reset_tracking(self):
+        """Forgets the tracked pose so the next frame goes through the model."""
+        if self.tracker is not None:
+            self.tracker.reset()
+
+    def finish_counting(self):
+        """Returns to preview; dumps the pipeline metrics once if an exercise just ended."""
+        if self.phase == self.COUNTING:
+            self.dump_metrics()
+        self.phase = self.PREVIEW
+        self.counter.stop()
+        self.stop_recording()
+
+    def start_recording(self):
+        self.stop_recording()
+        if not self.pose_log_dir:
+            return
+        try:
+            self.recorder = PoseRecorder.for_session(self.pose_log_dir, self.model.names, self.mode)
+        except OSError as e:
+            logging.error(f"Could not start pose log: {e}")
+
+    def stop_recording(self):
+        if self.recorder:
+            # Flush di thread terpisah agar loop deteksi tidak menunggu disk
+            threading.Thread(target=self.recorder.close, name="pose-recorder-close").start()
+            self.recorder = None
 
     def run(self):
+        self.model = self.load_model()
         if not self.model:
             return
 
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
-            self.errorOccurred.emit("Could not open webcam")
+        if not self.source.open():
+            self.errorOccurred.emit(f"Could not open {self.source.name}")
             return
-            
+
         self.running = True
-        prev_state = "stand"
-        state_changed = False
-        # squat_count, squat_start_time, plank_start_time, last_plank_detection_time
-        # sekarang diambil dari self. variabel
-        plank_active_time = 0.0
-        plank_detected_in_frame = False
-        no_detection_start = None
+        # Sumber offline diproses frame per frame tanpa ada yang dibuang
+        self.frame_buffer = LatestFrameBuffer(lossless=not self.source.realtime)
+        if self.source.realtime:
+            self.scheduler = AdaptiveScheduler(dynamic_imgsz=self.backend.dynamic_imgsz)
+        results = []
+        capture_thread = CaptureThread(self.source, self.frame_buffer)
+        capture_thread.start()
 
         try:
+            metrics = self.metrics
             while self.running:
-                ret, frame = self.cap.read()
-                if not ret:
+                # Selalu ambil frame terbaru; frame lama dibuang oleh buffer
+                stage_start = metrics.now()
+                item = self.frame_buffer.get(timeout=0.5)
+                if item is None:
+                    if self.frame_buffer.exhausted():
+                        break  # End of a video file / image sequence
                     continue
+                metrics.record("capture", stage_start)
+
+                frame, current_time = item
+                self.process_commands(current_time)
+                if self.tracker is not None:
+                    annotated_frame, detected_class, detected_conf = self.detect_with_tracking(frame)
+                else:
+                    # Saat melewati frame, hasil inferensi sebelumnya dipakai lagi
+                    if self.scheduler is None or self.scheduler.should_infer():
+                        results = self.infer(frame)
 
-                current_time = time.time()
-                results = self.model(frame, imgsz=640, verbose=False)
-                
-                # Process detections
-                annotated_frame, detected_class, detected_conf = self.process_detections(frame, results)
-
-                plank_detected_in_frame = False
-
-                data = {"mode": self.mode}
-
-                if self.mode == "squat":
-                    if detected_class == "squat" and prev_state == "stand":
-                        state_changed = True
-                    elif detected_class == "stand" and prev_state == "squat" and state_changed:
-                        if self.ready_to_start: # Hanya hitung jika penghitungan sudah dimulai
-                            self.squat_count += 1
-                        state_changed = False
-                    
-                    squat_duration = 0
-                    if self.ready_to_start:
-                        squat_duration = int(current_time - self.squat_start_time)
-
-                    data.update({
-                        "squat_count": self.squat_count,
-                        "squat_duration": squat_duration
-                    })
-                    prev_state, state_changed = self.update_squat_state(detected_class, prev_state, state_changed)
-                
-                elif self.mode == "plank":
-                    if detected_class == "plank" and detected_conf >= 70:
-                        plank_detected_in_frame = True
-                        
-                    if self.ready_to_start:
-                        if plank_detected_in_frame:
-                            plank_active_time += (current_time - self.last_plank_detection_time)
-                        self.last_plank_detection_time = current_time
-
-                        total_time = int(current_time - self.plank_start_time)
+                    # Process detections
+                    stage_start = metrics.now()
+                    if self.people is not None:
+                        annotated_frame, tracks, lost = self.process_people(frame, results, current_time)
                     else:
-                        total_time = 0
-                        plank_active_time = 0
-
-                    data.update({
-                        "plank_total_time": total_time,
-                        "plank_active_time": int(plank_active_time),
-                        "plank_accuracy": int(detected_conf) if detected_class == "plank" else 0
-                    })
-                    
-                    if detected_class == "plank" and detected_conf < 50:
-                        data["warning"] = "Plank accuracy below 50%! Stopping exercise."
-                        self.running = False
-
-                no_detection_start = self.update_no_detection(
-                    detected_class, current_time, no_detection_start
-                )
-                
-                if detected_class is None and no_detection_start and \
-                   (current_time - no_detection_start > 10):
-                    data["warning"] = "No pose detected for 10 seconds! Stopping exercise."
-                    self.running = False
+                        annotated_frame, detected_class, detected_conf = self.process_detections(frame, results)
+                    metrics.record("postprocess", stage_start)
+
+                stage_start = metrics.now()
+                if self.people is not None:
+                    data = self.counter.update(current_time, tracks, lost)
+                else:
+                    data = self.counter.update(current_time, detected_class, detected_conf)
+                if self.recorder:
+                    self.recorder.record(current_time, self.last_raw_detection)
 
                 if self.ready_to_start:
+                    if "warning" in data:
+                        # Sesi latihan berhenti, kamera tetap menyala untuk preview
+                        self.finish_counting()
                     self.updateData.emit(data)
-                self.emit_frame(annotated_frame)
-                self.msleep(1)
+                metrics.record("counting", stage_start)
+
+                if self.emit_frames:
+                    stage_start = metrics.now()
+                    self.emit_frame(annotated_frame)
+                    metrics.record("render", stage_start)
+                metrics.frame_done()
+                if metrics.report_due():
+                    self.updateStats.emit(self.pipeline_stats())
+                if self.source.realtime:
+                    self.msleep(1)
 
         except Exception as e:
             logging.error(f"Detection error: {e}")
             self.errorOccurred.emit(f"Detection error: {str(e)}")
         finally:
-            self.cap.release()
+            capture_thread.stop()
+            self.source.release()
+            logging.info(f"Detection stopped. Frame stats: {self.frame_stats()}, "
+                         f"scheduler: {self.scheduler_stats()}")
+            # Sesi yang masih berjalan ditutup di sini (metrics ditulis sekali per sesi)
+            self.finish_counting()
+
+    def frame_stats(self):
+        """Returns captured/consumed/dropped frame counts for this thread."""
+        return self.frame_buffer.stats() if self.frame_buffer else {}
+
+    def scheduler_stats(self):
+        """Returns the adaptive scheduler's current imgsz/stride and counters (empty for offline sources)."""
+        return self.scheduler.metrics() if self.scheduler else {}
+
+    def pipeline_stats(self):
+        """Per-stage latency percentiles and FPS plus frame and scheduler counters."""
+        stats = self.metrics.snapshot()
+        stats["frames"] = self.frame_stats()
+        stats["scheduler"] = self.scheduler_stats()
+        stats["display"] = self.frame_mailbox.stats()
+        if self.tracker is not None:
+            stats["tracking"] = self.tracker.stats()
+        if self.roi is not None:
+            stats["roi"] = self.roi.stats()
+        if self.people is not None:
+            stats["people"] = self.people.stats()
+        stats["summary"] = self.metrics.summary_text(stats)
+        if stats["summary"]:
+            stats["summary"] += f" | coalesced {stats['display']['coalesced']}"
+        return stats
+
+    def frame_delivered(self):
+        """Called by the GUI slot that receives updateFrame to time signal delivery."""
+        if self.frame_emitted_at is not None:
+            self.metrics.record("delivery", self.frame_emitted_at)
+
+    def dump_metrics(self):
+        if not self.metrics.enabled:
+            return
+        path = self.metrics.dump(extra={
+            "mode": self.mode,
+            "source": self.source.name,
+            "frames": self.frame_stats(),
+            "scheduler": self.scheduler_stats(),
+            "display": self.frame_mailbox.stats(),
+        })
+        if path:
+            logging.info(f"Pipeline metrics written to {path}")
+
+    def infer(self, frame):
+        imgsz = self.scheduler.imgsz if self.scheduler else self.imgsz
+        region = self.roi.region(frame.shape) if self.roi else None
+        self.results_offset = (0, 0)
+        if region is not None:
+            x1, y1, x2, y2 = region
+            frame = frame[y1:y2, x1:x2]
+            self.results_offset = (x1, y1)
+            # Model hasil export hanya menerima satu ukuran input
+            if self.backend.dynamic_imgsz:
+                imgsz = min(imgsz, self.roi.imgsz)
+
+        start = time.perf_counter()
+        results = self.backend.predict(frame, imgsz=imgsz)
+        if self.scheduler:
+            self.scheduler.record((time.perf_counter() - start) * 1000)
+        self.metrics.record("inference", start)
+        self.fresh_results = True
+        return results
+
+    def detect_with_tracking(self, frame):
+        """
+        Runs the model every tracker.interval frames (or earlier when tracking
+        confidence drops) and moves the keypoints with optical flow in between.
+        Tracked frames keep the class and confidence of the last model run, so
+        the counter still updates every frame: a repeated class never advances
+        the squat state machine, and plank time keeps accruing by frame time.
+        Returns:
+            tuple: (annotated_frame, class_name, conf_percent)
+        """
+        stage_start = self.metrics.now()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if not self.tracker.due():
+            detection = self.tracker.track(gray)
+            if detection is not None:
+                annotated_frame = pose_postprocess.annotate_detection(frame, detection)
+                self.last_detection = detection
+                self.last_raw_detection = detection
+                if self.scheduler:
+                    self.scheduler.count_tracked()
+                self.metrics.record("tracking", stage_start)
+                return annotated_frame, detection.class_name, detection.conf * 100
+
+        if self.scheduler:
+            self.scheduler.count_inference()
+        results = self.infer(frame)
+        stage_start = self.metrics.now()
+        output = self.process_detections(frame, results)
+        self.tracker.start(gray, self.last_detection)
+        self.metrics.record("postprocess", stage_start)
+        return output
 
     def process_detections(self, frame, results):
-        annotated_frame = frame.copy()
-        detected_class = None
-        detected_conf = 0.0
-        best_box = None
-        highest_conf = 0.0
-
-        for result in results:
-            if result.keypoints is not None:
-                for kp in result.keypoints.xy:
-                    keypoints = [(int(x), int(y)) for x, y in kp]
-
-                    for x, y in keypoints:
-                        cv2.circle(annotated_frame, (x, y), 4, (0, 0, 255), -1)
-
-                    skeleton = [
-                        (0, 1),      # head to neck
-                        (1, 2), (2, 3), (3, 4), (4, 5),      # left arm
-                        (1, 10), (10, 11), (11, 12), (12, 13),  # right arm
-                        (1, 6),       # neck to mid-hip
-                        (6, 17), (17, 14), (14, 15), (15, 18),  # left leg
-                        (6, 19), (19, 7), (7, 8), (8, 9)        # right leg
-                    ]
-
-                    for i, j in skeleton:
-                        if i < len(keypoints) and j < len(keypoints):
-                            pt1 = keypoints[i]
-                            pt2 = keypoints[j]
-                            if pt1 != (0, 0) and pt2 != (0, 0):
-                                cv2.line(annotated_frame, pt1, pt2, (255, 0, 0), 2)
-                            for box in result.boxes:
-                                conf = float(box.conf)
-                                if conf > highest_conf and conf > self.threshold:
-                                    highest_conf = conf
-                                    best_box = box
-                                    cls_id = int(box.cls)
-                                    detected_class = self.model.names[cls_id]
-                                    detected_conf = conf * 100
-
-        if best_box:
-            xyxy = best_box.xyxy[0].tolist()
-            color = (0, 255, 0)
-            thickness = 2
-            cv2.rectangle(
-                annotated_frame,
-                (int(xyxy[0]), int(xyxy[1])),
-                (int(xyxy[2]), int(xyxy[3])),
-                color, thickness
-            )
-            label = f"{detected_class}: {detected_conf:.1f}%"
-            cv2.putText(
-                annotated_frame, label,
-                (int(xyxy[0]), int(xyxy[1]) - 10),
-                cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, thickness
-            )
-
-        return annotated_frame, detected_class, detected_conf
-
-    def update_squat_state(self, detected_class, prev_state, state_changed):
-        if detected_class == "squat":
-            if prev_state == "stand":
-                state_changed = True
-            return "squat", state_changed
-        elif detected_class == "stand":
-            return "stand", state_changed
-        return prev_state, state_changed
-
-    def update_no_detection(self, detected_class, current_time, no_detection_start):
-        if detected_class is None:
-            return current_time if no_detection_start is None else no_detection_start
-        return None
+        annotated_frame, detection, raw_detection = pose_postprocess.process_detections(
+            frame, results, self.model.names, self.threshold, self.results_offset
+        )
+        self.last_detection = detection
+        self.last_raw_detection = raw_detection
+        if self.roi and self.fresh_results:
+            self.roi.update(detection)
+        self.fresh_results = False
+        if detection is None:
+            return annotated_frame, None, 0.0
+        return annotated_frame, detection.class_name, detection.conf * 100
+
+    def process_people(self, frame, results, current_time):
+        """
+        Matches every detection above threshold to a persistent track id.
+        The pose log keeps recording only the top detection of each frame.
+        Returns:
+            tuple: (annotated_frame, {track_id: (class_name, conf_percent)}, lost_track_ids)
+        """
+        detections = pose_postprocess.select_detections(
+            results, self.model.names, self.threshold, self.results_offset
+        )
+        matched, lost = self.people.update(current_time, detections)
+        self.last_detection = detections[0] if detections else None
+        self.last_raw_detection = self.last_detection
+        annotated_frame = pose_postprocess.annotate_tracks(frame, results, matched, self.results_offset)
+        tracks = {
+            track_id: (detection.class_name, detection.conf * 100)
+            for track_id, detection in matched.items()
+        }
+        return annotated_frame, tracks, lost
 
     def emit_frame(self, frame):
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        height, width, channels = rgb_frame.shape
-        bytes_per_line = channels * width
-        q_img = QImage(rgb_frame.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        self.updateFrame.emit(q_img)
+        # Resize dan konversi sekali di worker; GUI hanya tinggal menggambar
+        if self.renderer is None:
+            self.renderer = FrameRenderer()
+        slot, q_img = self.renderer.render(frame, self.frame_mailbox.busy_slots())
+        self.frame_emitted_at = self.metrics.now()
+        self.frame_mailbox.post(slot, q_img)
+
+    def deliver_frame(self):
+        """Runs on the GUI thread at display rate; emits only the newest frame."""
+        q_img = self.frame_mailbox.take()
+        if q_img is not None:
+            self.updateFrame.emit(q_img)
 
     def stop(self):
         self.running = False
@@ -0,0 +1,107 @@
+import time
+import logging
+import threading
+from collections import deque
+
+
+class LatestFrameBuffer:
+    """
+    Small ring buffer between the capture and inference stages.
+    For live sources the capture side never blocks; when the consumer is
+    slower, older frames are overwritten and counted as dropped so inference
+    always sees the newest one. With lossless=True (offline sources) the
+    producer waits for space instead and frames are consumed in order.
+    """
+
+    def __init__(self, capacity=2, lossless=False):
+        self.frames = deque(maxlen=capacity)
+        self.lossless = lossless
+        self.condition = threading.Condition()
+        self.closed = False
+        self.captured = 0
+        self.consumed = 0
+        self.dropped = 0
+
+    def put(self, frame, timestamp):
+        with self.condition:
+            if self.lossless:
+                self.condition.wait_for(
+                    lambda: self.closed or len(self.frames) < self.frames.maxlen
+                )
+                if self.closed:
+                    return
+            elif len(self.frames) == self.frames.maxlen:
+                self.dropped += 1
+            self.frames.append((frame, timestamp))
+            self.captured += 1
+            self.condition.notify_all()
+
+    def close(self):
+        """Marks the end of the stream; waiting readers and writers wake up."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def exhausted(self):
+        with self.condition:
+            return self.closed and not self.frames
+
+    def get(self, timeout=None):
+        """
+        Takes the newest frame and discards anything older (or, in lossless
+        mode, takes the oldest frame).
+        Returns:
+            tuple: (frame, timestamp), or None if nothing arrived within timeout.
+        """
+        with self.condition:
+            if not self.frames and not self.condition.wait_for(
+                    lambda: self.frames or self.closed, timeout):
+                return None
+            if not self.frames:
+                return None
+            if self.lossless:
+                frame, timestamp = self.frames.popleft()
+            else:
+                frame, timestamp = self.frames.pop()
+                self.dropped += len(self.frames)
+                self.frames.clear()
+            self.consumed += 1
+            self.condition.notify_all()
+            return frame, timestamp
+
+    def stats(self):
+        with self.condition:
+            return {
+                "captured": self.captured,
+                "consumed": self.consumed,
+                "dropped": self.dropped,
+            }
+
+
+class CaptureThread(threading.Thread):
+    """Reads frames from an opened FrameSource into a LatestFrameBuffer."""
+
+    def __init__(self, source, buffer):
+        super().__init__(name="frame-capture", daemon=True)
+        self.source = source
+        self.buffer = buffer
+        self.running = False
+
+    def run(self):
+        self.running = True
+        try:
+            while self.running and not self.source.finished:
+                ok, frame, timestamp = self.source.read()
+                if not ok:
+                    time.sleep(0.005)
+                    continue
+                self.buffer.put(frame, timestamp)
+        finally:
+            self.buffer.close()
+
+    def stop(self, timeout=2.0):
+        self.running = False
+        self.buffer.close()
+        self.join(timeout)
+        if self.is_alive():
+            logging.warning("Capture thread did not stop in time")
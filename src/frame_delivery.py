@@ -0,0 +1,139 @@
+import threading
+import cv2
+import numpy as np
+from PyQt5.QtGui import QImage, QGuiApplication
+from camera_view import DISPLAY_WIDTH, DISPLAY_HEIGHT
+
+
+class FrameRenderer:
+    """
+    Turns annotated BGR frames into display-ready QImages in the worker thread.
+
+    Each frame is resized once to fit the camera view (keeping aspect ratio)
+    and converted to BGRA, the memory layout of QImage.Format_RGB32, so the
+    GUI can paint it without any conversion or scaling. All intermediate and
+    output buffers are allocated up front and reused. The QImages wrap
+    buffers owned by this renderer, so they never point at freed memory;
+    buffers still pending or on screen (see FrameMailbox) are never reused.
+    """
+
+    def __init__(self, width=DISPLAY_WIDTH, height=DISPLAY_HEIGHT, pool_size=3, buffers=None):
+        self.width = width
+        self.height = height
+        # buffers: (height, width, 4) uint8 arrays to render into, e.g. shared memory
+        if buffers is None:
+            buffers = [np.zeros((height, width, 4), dtype=np.uint8) for _ in range(pool_size)]
+        self.buffers = list(buffers)
+        self.images = [
+            QImage(buf.data, width, height, width * 4, QImage.Format_RGB32)
+            for buf in self.buffers
+        ]
+        self.index = 0
+        self.source_size = None
+        self.target = None
+        self.resized = None
+
+    def layout_for(self, frame_width, frame_height):
+        """Computes the scaled size and letterbox offset for a source size."""
+        scale = min(self.width / frame_width, self.height / frame_height)
+        target_width = max(1, int(round(frame_width * scale)))
+        target_height = max(1, int(round(frame_height * scale)))
+        x = (self.width - target_width) // 2
+        y = (self.height - target_height) // 2
+        self.source_size = (frame_width, frame_height)
+        self.target = (x, y, target_width, target_height)
+        if (target_width, target_height) != (frame_width, frame_height):
+            self.resized = np.empty((target_height, target_width, 3), dtype=np.uint8)
+        else:
+            self.resized = None
+        # Area di luar gambar (letterbox) tetap hitam
+        for buf in self.buffers:
+            buf[:] = 0
+            buf[..., 3] = 255
+
+    def render(self, frame, busy_slots=()):
+        """
+        Args:
+            frame (np.ndarray): Annotated BGR frame of any size.
+            busy_slots: Pool slots that must not be overwritten.
+        Returns:
+            tuple: (slot, QImage) with the image backed by a free pool buffer.
+        """
+        frame_height, frame_width = frame.shape[:2]
+        if self.source_size != (frame_width, frame_height):
+            self.layout_for(frame_width, frame_height)
+        x, y, target_width, target_height = self.target
+
+        src = frame
+        if self.resized is not None:
+            cv2.resize(frame, (target_width, target_height), dst=self.resized,
+                       interpolation=cv2.INTER_AREA)
+            src = self.resized
+
+        slot = self.index
+        while slot in busy_slots:
+            slot = (slot + 1) % len(self.buffers)
+        buf = self.buffers[slot]
+        cv2.cvtColor(src, cv2.COLOR_BGR2BGRA,
+                     dst=buf[y:y + target_height, x:x + target_width])
+        self.index = (slot + 1) % len(self.buffers)
+        return slot, self.images[slot]
+
+
+class FrameMailbox:
+    """
+    Single-slot handoff from the detection worker to the GUI.
+    The worker posts every rendered frame; the GUI takes at most one per
+    display refresh. A frame replaced before the GUI took it is counted as
+    coalesced, so the Qt event queue never holds more than one frame.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = None
+        self.displayed_slot = None
+        self.posted = 0
+        self.delivered = 0
+        self.coalesced = 0
+
+    def post(self, slot, image):
+        with self.lock:
+            if self.pending is not None:
+                self.coalesced += 1
+            self.pending = (slot, image)
+            self.posted += 1
+
+    def take(self):
+        """Returns the newest undelivered QImage, or None if there is none."""
+        with self.lock:
+            if self.pending is None:
+                return None
+            slot, image = self.pending
+            self.pending = None
+            self.displayed_slot = slot
+            self.delivered += 1
+            return image
+
+    def busy_slots(self):
+        with self.lock:
+            busy = {self.displayed_slot}
+            if self.pending is not None:
+                busy.add(self.pending[0])
+            return busy
+
+    def stats(self):
+        with self.lock:
+            return {
+                "posted": self.posted,
+                "delivered": self.delivered,
+                "coalesced": self.coalesced,
+            }
+
+
+def display_interval_ms():
+    """Frame interval of the primary screen, falling back to 60 Hz."""
+    screen = QGuiApplication.primaryScreen() if QGuiApplication.instance() else None
+    rate = screen.refreshRate() if screen else 0
+    if not rate or rate <= 0:
+        rate = 60.0
+    return max(1, int(1000 / rate))
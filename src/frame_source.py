@@ -0,0 +1,179 @@
+"""
+Frame sources for DetectionThread.
+
+A source yields (frame, timestamp) pairs. Live sources (the webcam) are
+realtime: frames arrive at their own pace and the pipeline drops stale
+ones. Offline sources (video files, image folders, in-memory frames) are
+non-realtime by default: every frame is processed, as fast as the CPU
+allows, and timestamps come from the media clock instead of the wall clock.
+"""
+import os
+import time
+import cv2
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+class FrameSource:
+    name = "source"
+    realtime = False
+
+    def __init__(self):
+        self.finished = False
+
+    def open(self):
+        """Returns True if the source is ready to read."""
+        return True
+
+    def read(self):
+        """
+        Returns:
+            tuple: (ok, frame, timestamp). ok is False for a transient read
+            failure; self.finished is set once the source has no more frames.
+        """
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class CameraSource(FrameSource):
+    name = "webcam"
+    realtime = True
+
+    def __init__(self, index=0):
+        super().__init__()
+        self.index = index
+        self.cap = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.index)
+        return self.cap.isOpened()
+
+    def read(self):
+        ret, frame = self.cap.read()
+        return ret, frame, time.time()
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+class PacedSource(FrameSource):
+    """Base for offline sources; with realtime=True frames are paced at fps."""
+
+    def __init__(self, fps=30.0, realtime=False):
+        super().__init__()
+        self.fps = fps
+        self.realtime = realtime
+        self.frame_index = 0
+        self.started_at = None
+
+    def media_time(self):
+        return self.frame_index / self.fps
+
+    def pace(self):
+        if not self.realtime:
+            return
+        if self.started_at is None:
+            self.started_at = time.perf_counter()
+        delay = self.started_at + self.media_time() - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def next_timestamp(self):
+        self.pace()
+        timestamp = self.media_time()
+        self.frame_index += 1
+        return timestamp
+
+
+class VideoFileSource(PacedSource):
+    def __init__(self, path, realtime=False):
+        super().__init__(realtime=realtime)
+        self.path = path
+        self.name = os.path.basename(path)
+        self.cap = None
+
+    def open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            return False
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        return True
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret:
+            self.finished = True
+            return False, None, None
+        return True, frame, self.next_timestamp()
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+class ImageSequenceSource(PacedSource):
+    """Reads every image in a directory in file-name order."""
+
+    def __init__(self, directory, fps=30.0, realtime=False):
+        super().__init__(fps=fps, realtime=realtime)
+        self.directory = directory
+        self.name = os.path.basename(os.path.normpath(directory))
+        self.paths = []
+
+    def open(self):
+        if not os.path.isdir(self.directory):
+            return False
+        self.paths = sorted(
+            os.path.join(self.directory, f) for f in os.listdir(self.directory)
+            if f.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        return bool(self.paths)
+
+    def read(self):
+        if self.frame_index >= len(self.paths):
+            self.finished = True
+            return False, None, None
+        frame = cv2.imread(self.paths[self.frame_index])
+        timestamp = self.next_timestamp()
+        return frame is not None, frame, timestamp
+
+
+class SyntheticSource(PacedSource):
+    """
+    Serves frames from memory: a list/iterable of BGR frames, or (by default)
+    `count` generated noise frames. Useful for benchmarks without a camera.
+    """
+    name = "synthetic"
+
+    def __init__(self, frames=None, count=300, size=(480, 640), fps=30.0, realtime=False):
+        super().__init__(fps=fps, realtime=realtime)
+        if frames is None:
+            rng = np.random.default_rng(0)
+            base = rng.integers(0, 256, size=(*size, 3), dtype=np.uint8)
+            frames = (np.roll(base, i, axis=1) for i in range(count))
+        self.frames = iter(frames)
+
+    def read(self):
+        frame = next(self.frames, None)
+        if frame is None:
+            self.finished = True
+            return False, None, None
+        return True, frame, self.next_timestamp()
+
+
+def open_source(spec):
+    """
+    Builds a source from a command-line style spec: a camera index ("0"),
+    a video file, a directory of images, or "synthetic".
+    """
+    if spec is None or str(spec).isdigit():
+        return CameraSource(int(spec or 0))
+    if spec == "synthetic":
+        return SyntheticSource()
+    if os.path.isdir(spec):
+        return ImageSequenceSource(spec)
+    return VideoFileSource(spec)
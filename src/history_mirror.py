@@ -0,0 +1,341 @@
+"""
+Local SQLite mirror of this PC's history.
+
+Every history read of the app (table pages, incremental refresh, statistics)
+is served from this file at local-disk speed, so the History tab works the
+same whether MySQL is fast, slow or down. New sessions are inserted here
+first as unsynced rows; HistoryWriter (history_queue.py) pushes them to
+MySQL in the background and pulls rows added elsewhere since the last
+remote id it has seen.
+
+The read and insert methods have the same signatures as the ones in db.py,
+so a second HistoryMirror can stand in for MySQL when testing the sync
+without a network:
+
+    python src/history_mirror.py
+"""
+import os
+import json
+import logging
+import sqlite3
+import threading
+from config_manager import get_pc_id
+from history_sql import DAILY_SUMMARY_DDL, history_page_sql, history_page, daily_summary_sql
+from history_stats import SUMMARY_FIELDS, SUM_FIELDS, daily_rows
+
+MIRROR_PATH = os.getenv("HISTORY_MIRROR", "history_mirror.db")
+# Spool lama (sebelum ada mirror); record yang tersisa dipindahkan saat start
+SPOOL_PATH = os.getenv("HISTORY_SPOOL", "history_spool.db")
+
+RECORD_FIELDS = (
+    "name", "mode", "squat_count", "squat_duration", "plank_active_time",
+    "plank_total_time", "timestamp", "pc_id",
+)
+
+MIRROR_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        remote_id INTEGER UNIQUE,
+        synced INTEGER NOT NULL DEFAULT 0,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        name TEXT,
+        mode TEXT,
+        squat_count INTEGER DEFAULT 0,
+        squat_duration INTEGER DEFAULT 0,
+        plank_active_time INTEGER DEFAULT 0,
+        plank_total_time INTEGER DEFAULT 0,
+        timestamp TEXT,
+        pc_id TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_history_pc_time ON history (pc_id, timestamp, id);
+    CREATE INDEX IF NOT EXISTS idx_history_pc_mode_time ON history (pc_id, mode, timestamp, id);
+    CREATE INDEX IF NOT EXISTS idx_history_pc_id ON history (pc_id, id);
+    CREATE INDEX IF NOT EXISTS idx_history_unsynced ON history (synced, id);
+    CREATE TABLE IF NOT EXISTS sync_state (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+"""
+
+INSERT_SQL = (
+    f"INSERT INTO history (remote_id, synced, {', '.join(RECORD_FIELDS)}) "
+    f"VALUES (?, ?, {', '.join('?' for _ in RECORD_FIELDS)})"
+)
+
+UPSERT_DAILY_SQL = (
+    f"INSERT INTO history_daily (pc_id, day, mode, {', '.join(SUMMARY_FIELDS)}) "
+    f"VALUES (?, ?, ?, {', '.join('?' for _ in SUMMARY_FIELDS)}) "
+    f"ON CONFLICT (pc_id, day, mode) DO UPDATE SET "
+    + ", ".join(
+        f"{field} = {field} + excluded.{field}" if field in SUM_FIELDS
+        else f"{field} = MAX({field}, excluded.{field})"
+        for field in SUMMARY_FIELDS
+    )
+)
+
+
+# Error karena isi baris (bukan karena file/koneksi); baris seperti ini dilewati
+BAD_ROW_ERRORS = (TypeError, ValueError, sqlite3.IntegrityError)
+
+
+def mirror_record(row):
+    """The RECORD_FIELDS of a record or MySQL row, with the timestamp as text."""
+    record = {field: row.get(field) for field in RECORD_FIELDS}
+    if record["timestamp"] is not None:
+        record["timestamp"] = str(record["timestamp"])
+    return record
+
+
+class HistoryMirror:
+    """
+    SQLite copy of the history and history_daily tables of one PC, plus the
+    queue of rows that are not in MySQL yet (synced = 0; -1 for rows parked
+    after failing too often).
+    Safe to use from the GUI thread and the sync thread at the same time.
+    """
+
+    def __init__(self, path=MIRROR_PATH, pc_id=None):
+        self.path = path
+        self.pc_id = pc_id or get_pc_id()
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(MIRROR_SCHEMA + DAILY_SUMMARY_DDL + ";")
+        self.conn.commit()
+
+    def select(self, sql, params=()):
+        with self.lock:
+            rows = self.conn.execute(sql.replace("%s", "?"), params).fetchall()
+        return [dict(row) for row in rows]
+
+    # Sama dengan fungsi baca di db.py
+    def fetch_history(self, mode=None, date_from=None, date_to=None, name=None,
+                      limit=200, after=None, pc_id=None, sort="timestamp", descending=True):
+        sql, params = history_page_sql(
+            pc_id or self.pc_id, mode, date_from, date_to, name, limit, after, sort, descending
+        )
+        return history_page(self.select(sql, params), limit)
+
+    def fetch_history_watermark(self):
+        return self.select("SELECT COALESCE(MAX(id), 0) AS id FROM history")[0]["id"]
+
+    def fetch_history_since(self, after_id, pc_id=None, limit=500):
+        return self.select(
+            "SELECT * FROM history WHERE id > ? AND pc_id = ? ORDER BY id LIMIT ?",
+            (after_id, pc_id or self.pc_id, limit),
+        )
+
+    def fetch_daily_summary(self, mode=None, date_from=None, date_to=None, name=None, pc_id=None):
+        return self.select(*daily_summary_sql(pc_id or self.pc_id, mode, date_from, date_to, name))
+
+    def insert_rows(self, records, remote_ids=None):
+        """Inserts records and updates history_daily; the caller holds the lock and commits."""
+        records = [mirror_record(record) for record in records]
+        remote_ids = remote_ids or [None] * len(records)
+        self.conn.executemany(INSERT_SQL, [
+            (remote_id, int(remote_id is not None), *(record[f] for f in RECORD_FIELDS))
+            for record, remote_id in zip(records, remote_ids)
+        ])
+        self.conn.executemany(UPSERT_DAILY_SQL, [
+            (row["pc_id"], row["day"], row["mode"], *(row[f] for f in SUMMARY_FIELDS))
+            for row in daily_rows(records) if row["pc_id"] and row["mode"] and row["day"]
+        ])
+
+    def insert_history_batch(self, records):
+        """Stores new sessions as unsynced rows (one small local commit)."""
+        with self.lock:
+            try:
+                self.insert_rows(records)
+            except Exception:
+                self.conn.rollback()
+                raise
+            self.conn.commit()
+
+    # Antrian untuk HistoryWriter: baris yang belum ada di MySQL
+    def append(self, record):
+        self.insert_history_batch([record])
+
+    def peek(self, limit):
+        """
+        Returns:
+            list: (id, record) pairs of the oldest unsynced rows.
+        """
+        rows = self.select(
+            "SELECT * FROM history WHERE synced = 0 ORDER BY id LIMIT ?", (limit,)
+        )
+        return [(row["id"], mirror_record(row)) for row in rows]
+
+    def mark_synced(self, ids):
+        with self.lock:
+            self.conn.executemany("UPDATE history SET synced = 1 WHERE id = ?", [(i,) for i in ids])
+            self.conn.commit()
+
+    def mark_failed(self, ids, max_attempts=None):
+        """
+        Counts one failed write for each row. Rows that reached max_attempts
+        are parked (synced = -1): they stay in the mirror but peek() no
+        longer returns them.
+        Returns:
+            list: Ids of the rows that were parked.
+        """
+        with self.lock:
+            self.conn.executemany(
+                "UPDATE history SET attempts = attempts + 1 WHERE id = ?", [(i,) for i in ids]
+            )
+            parked = []
+            if max_attempts:
+                parked = [row[0] for row in self.conn.execute(
+                    f"SELECT id FROM history WHERE synced = 0 AND attempts >= ? "
+                    f"AND id IN ({', '.join('?' for _ in ids)})", (max_attempts, *ids)
+                )]
+                self.conn.executemany("UPDATE history SET synced = -1 WHERE id = ?", [(i,) for i in parked])
+            self.conn.commit()
+        return parked
+
+    def requeue_parked(self):
+        """
+        Puts parked rows back in the queue with a fresh attempt count.
+        Returns:
+            int: Number of rows requeued.
+        """
+        with self.lock:
+            count = self.conn.execute(
+                "UPDATE history SET synced = 0, attempts = 0 WHERE synced = -1"
+            ).rowcount
+            self.conn.commit()
+        return count
+
+    def __len__(self):
+        return self.select("SELECT COUNT(*) AS n FROM history WHERE synced = 0")[0]["n"]
+
+    def remote_watermark(self):
+        rows = self.select("SELECT value FROM sync_state WHERE key = 'remote_watermark'")
+        return int(rows[0]["value"]) if rows else 0
+
+    def pull(self, fetch_since, limit=500):
+        """
+        Copies one batch of rows added to the remote history since the last pull.
+        Args:
+            fetch_since: db.fetch_history_since, or another mirror's method.
+        Returns:
+            tuple: (rows new to this mirror, True if more rows may be waiting)
+        """
+        rows = fetch_since(self.remote_watermark(), pc_id=self.pc_id, limit=limit)
+        added = self.apply_remote(rows) if rows else 0
+        return added, len(rows) == limit
+
+    def apply_remote(self, rows):
+        """
+        Adds remote rows that are not in the mirror yet. Rows this PC pushed
+        itself come back here too; they are matched to their local row by
+        (pc_id, timestamp, name, mode), which is then marked synced. A row
+        whose push was committed but not acknowledged is therefore not sent
+        again, as long as this pull runs before the retry (HistoryWriter
+        pulls first after a failed push).
+        A remote row that cannot be stored is logged and skipped, the same
+        way a local record that keeps failing is parked, so it does not stop
+        every later pull at the same watermark.
+        """
+        ids = [row["id"] for row in rows]
+        with self.lock:
+            try:
+                added = self.merge_remote(rows)
+                self.conn.commit()
+            except BAD_ROW_ERRORS as e:
+                self.conn.rollback()
+                logging.warning(f"Remote history batch could not be stored ({e}); storing it row by row")
+                added = 0
+                for row in rows:
+                    try:
+                        added += self.merge_remote([row])
+                        self.conn.commit()
+                    except BAD_ROW_ERRORS as e:
+                        self.conn.rollback()
+                        logging.error(f"Skipped remote history row {row['id']}: {e}")
+            except Exception:
+                self.conn.rollback()
+                raise
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (key, value) VALUES ('remote_watermark', ?)",
+                (str(max(ids)),),
+            )
+            self.conn.commit()
+        return added
+
+    def merge_remote(self, rows):
+        """Matches or inserts remote rows; the caller holds the lock and commits."""
+        ids = [row["id"] for row in rows]
+        known = {row[0] for row in self.conn.execute(
+            f"SELECT remote_id FROM history WHERE remote_id IN ({', '.join('?' for _ in ids)})", ids
+        )}
+        # Baris lokal yang belum punya pasangan di MySQL, per (pc_id, timestamp, name, mode)
+        unmatched = {}
+        for row in self.conn.execute(
+            "SELECT id, pc_id, timestamp, name, mode FROM history WHERE remote_id IS NULL ORDER BY id"
+        ):
+            unmatched.setdefault(tuple(row)[1:], []).append(row["id"])
+        new_records, new_ids = [], []
+        for row in rows:
+            if row["id"] in known:
+                continue
+            record = mirror_record(row)
+            local = unmatched.get((record["pc_id"], record["timestamp"], record["name"], record["mode"]))
+            if local:
+                self.conn.execute(
+                    "UPDATE history SET remote_id = ?, synced = 1 WHERE id = ?",
+                    (row["id"], local.pop(0)),
+                )
+            else:
+                new_records.append(record)
+                new_ids.append(row["id"])
+        if new_records:
+            self.insert_rows(new_records, new_ids)
+        return len(new_records)
+
+    def import_spool(self, path=SPOOL_PATH):
+        """Moves records left in the old history_spool.db into the mirror, then deletes it."""
+        if not os.path.exists(path):
+            return 0
+        conn = sqlite3.connect(path)
+        try:
+            records = [json.loads(record) for record, in
+                       conn.execute("SELECT record FROM pending ORDER BY id")]
+        except sqlite3.Error:
+            records = []
+        finally:
+            conn.close()
+        if records:
+            self.insert_history_batch(records)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+        logging.info(f"Moved {len(records)} spooled history records into {self.path}")
+        return len(records)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+if __name__ == "__main__":
+    # Sinkronisasi dua arah dengan SQLite di kedua sisi, tanpa MySQL
+    import tempfile
+    from functools import partial
+    from history_queue import HistoryWriter
+    logging.basicConfig(level=logging.INFO)
+    folder = tempfile.mkdtemp()
+    local = HistoryMirror(os.path.join(folder, "local.db"), pc_id="pc-a")
+    remote = HistoryMirror(os.path.join(folder, "remote.db"), pc_id="pc-a")
+    writer = HistoryWriter(local, insert_batch=remote.insert_history_batch,
+                           pull=partial(local.pull, remote.fetch_history_since))
+    session = {"name": "demo", "mode": "squat", "squat_count": 10, "squat_duration": 30,
+               "pc_id": "pc-a", "timestamp": "2026-01-01 08:00:00"}
+    local.append(session)
+    remote.append(dict(session, name="other device", timestamp="2026-01-02 08:00:00"))
+    writer.flush_batch()
+    pulled, _ = local.pull(remote.fetch_history_since)
+    print(f"pushed 1 row, pulled {pulled} new rows; unsynced left: {len(local)}")
+    for mirror in (local, remote):
+        rows, _ = mirror.fetch_history()
+        print(mirror.path, [(row["name"], row["timestamp"]) for row in rows])
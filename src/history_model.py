@@ -0,0 +1,144 @@
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from db import fetch_history
+
+PAGE_SIZE = 200
+HEADERS = ["Name", "Mode", "Count/Time", "Duration", "Date/Time"]
+# Kolom tabel -> sort key di history_sql.HISTORY_SORT_KEYS
+SORT_KEYS = ["name", "mode", "metric", "duration", "timestamp"]
+
+
+def sort_value(record, key):
+    """Python version of the SQL sort expressions, for records merged locally."""
+    squat = record.get("mode") == "squat"
+    if key == "name":
+        return record.get("name") or ""
+    if key == "mode":
+        return record.get("mode") or ""
+    if key == "metric":
+        return record.get("squat_count" if squat else "plank_active_time") or 0
+    if key == "duration":
+        return record.get("squat_duration" if squat else "plank_total_time") or 0
+    return str(record.get("timestamp", ""))
+
+
+class HistoryTableModel(QAbstractTableModel):
+    """
+    History rows for a QTableView, loaded a page at a time.
+    The view asks for more rows through canFetchMore/fetchMore as it
+    scrolls; filtering and sorting are done in SQL by `fetch` (db.fetch_history
+    or HistoryMirror.fetch_history).
+    Cell text is formatted on demand, so no per-cell objects are kept.
+    """
+
+    def __init__(self, fetch=fetch_history, parent=None):
+        super().__init__(parent)
+        self.fetch = fetch
+        self.rows = []
+        self.filters = {}
+        self.sort_key = "timestamp"
+        self.descending = True
+        self.cursor = None
+        self.known_ids = set()
+
+    def reset(self, filters):
+        """Loads the first page for new filters."""
+        self.filters = filters
+        rows, self.cursor = self.fetch(
+            limit=PAGE_SIZE, sort=self.sort_key, descending=self.descending, **filters
+        )
+        self.beginResetModel()
+        self.known_ids = {row["id"] for row in rows}
+        self.rows = rows
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return HEADERS[section]
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.TextAlignmentRole and index.column() in (2, 3):
+            return Qt.AlignCenter
+        if role != Qt.DisplayRole:
+            return None
+        record = self.rows[index.row()]
+        column = index.column()
+        mode = record.get("mode", "") or ""
+        if column == 0:
+            return record.get("name", "Unknown")
+        if column == 1:
+            return mode.capitalize()
+        if column == 2:
+            if mode == "squat":
+                return str(record.get("squat_count", 0))
+            return f"{record.get('plank_active_time', 0)} sec"
+        if column == 3:
+            if mode == "squat":
+                return f"{record.get('squat_duration', 0)} sec"
+            return f"{record.get('plank_total_time', 0)} sec"
+        return str(record.get("timestamp", ""))
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self.cursor is not None
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self.cursor is None:
+            return
+        rows, self.cursor = self.fetch(
+            limit=PAGE_SIZE, after=self.cursor, sort=self.sort_key,
+            descending=self.descending, **self.filters
+        )
+        rows = [row for row in rows if row["id"] not in self.known_ids]
+        if not rows:
+            return
+        self.known_ids.update(row["id"] for row in rows)
+        self.beginInsertRows(QModelIndex(), len(self.rows), len(self.rows) + len(rows) - 1)
+        self.rows.extend(rows)
+        self.endInsertRows()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        key = SORT_KEYS[column]
+        descending = order == Qt.DescendingOrder
+        if (key, descending) == (self.sort_key, self.descending):
+            return
+        self.sort_key = key
+        self.descending = descending
+        if self.filters:
+            self.reset(self.filters)
+
+    def position_for(self, record):
+        """
+        Index where a record belongs in the loaded rows, or None if it sorts
+        after the last loaded page (it will arrive with fetchMore).
+        """
+        value = sort_value(record, self.sort_key)
+        for i, row in enumerate(self.rows):
+            current = sort_value(row, self.sort_key)
+            if (value > current) if self.descending else (value < current):
+                return i
+        return None if self.cursor is not None else len(self.rows)
+
+    def insert_record(self, record):
+        """
+        Inserts a single row at its sorted position.
+        Returns:
+            bool: False if it belongs to a page that is not loaded yet.
+        """
+        if record["id"] in self.known_ids:
+            return True
+        position = self.position_for(record)
+        if position is None:
+            return False
+        self.known_ids.add(record["id"])
+        self.beginInsertRows(QModelIndex(), position, position)
+        self.rows.insert(position, record)
+        self.endInsertRows()
+        return True
@@ -0,0 +1,226 @@
+"""
+Background sync of history records with MySQL.
+
+Finished sessions are first inserted into the local HistoryMirror as
+unsynced rows (a single small commit, safe to do on the GUI thread), then a
+background thread moves them to MySQL in batches with executemany. Rows are
+marked synced only after MySQL has committed them, so they survive database
+outages and app restarts.
+
+A failed batch stays as it is and is retried with exponential backoff.
+Only errors about the data itself (db.RECORD_ERRORS: DataError,
+IntegrityError) send the batch again one record at a time, so the good
+records get through and only the bad one counts a failed attempt. A record
+that fails HISTORY_MAX_ATTEMPTS times is parked in the spool and no longer
+holds up the queue; parked records are queued again each time the writer
+starts. Everything else (connection loss, missing table or privilege,
+deadlocks) is retried without charging the records.
+
+A batch whose commit was not acknowledged may still be in MySQL. Before
+such a batch is sent again (and on startup, after a possible crash) the
+writer pulls first: HistoryMirror.apply_remote matches the rows that did
+arrive to their local rows and marks them synced, so they are not inserted
+twice. After pushing, the same thread pulls rows added to MySQL since the
+last sync, and does so again every HISTORY_SYNC_INTERVAL seconds.
+"""
+import os
+import time
+import logging
+import sqlite3
+import threading
+from functools import partial
+from PyQt5.QtCore import QThread, pyqtSignal
+
+SYNC_INTERVAL = float(os.getenv("HISTORY_SYNC_INTERVAL", "60"))
+MAX_ATTEMPTS = int(os.getenv("HISTORY_MAX_ATTEMPTS", "5"))
+
+
+class HistoryWriter(QThread):
+    """
+    Background thread that pushes the unsynced rows of a HistoryMirror to
+    MySQL and pulls new remote rows into it.
+    recordsWritten is emitted after every committed batch, recordsPulled
+    when rows new to the mirror arrived; writeFailed once at the start of
+    each run of failures (not on every retry).
+    """
+    recordsWritten = pyqtSignal(int)
+    recordsPulled = pyqtSignal(int)
+    writeFailed = pyqtSignal(str)
+
+    def __init__(self, spool, insert_batch=None, pull=None, batch_size=50,
+                 min_backoff=1.0, max_backoff=60.0, pull_interval=SYNC_INTERVAL,
+                 max_attempts=MAX_ATTEMPTS,
+                 record_errors=(TypeError, ValueError, sqlite3.IntegrityError), parent=None):
+        super().__init__(parent)
+        self.prepare = None
+        if insert_batch is None:
+            from db import insert_history_batch as insert_batch, ensure_schema, fetch_history_since
+            from db import RECORD_ERRORS as record_errors
+            self.prepare = ensure_schema
+            pull = pull or partial(spool.pull, fetch_history_since)
+        self.spool = spool
+        self.insert_batch = insert_batch
+        # Error yang berarti isi record-nya salah; error lain dicoba ulang tanpa batas
+        self.record_errors = record_errors
+        self.max_attempts = max_attempts
+        self.pull_remote = pull
+        self.pull_interval = pull_interval if pull else None
+        self.batch_size = batch_size
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.backoff = 0.0
+        self.wakeup = threading.Event()
+        self.running = False
+        self.written = 0
+        self.failures = 0
+        self.pulled = 0
+        self.parked = 0
+        # True jika push terakhir mungkin sudah masuk MySQL tanpa konfirmasi
+        self.unconfirmed = True
+
+    def enqueue(self, record):
+        """Stores the record durably and wakes the writer. Safe on the GUI thread."""
+        self.spool.append(record)
+        self.wakeup.set()
+
+    def sync_now(self):
+        """Wakes the thread for a push and pull without waiting for the interval."""
+        self.wakeup.set()
+
+    def run(self):
+        self.running = True
+        if self.prepare:
+            # Tabel dan index history disiapkan sekali, di luar GUI thread
+            try:
+                self.prepare()
+            except Exception as e:
+                logging.warning(f"Could not prepare history schema: {e}")
+        # Record yang diparkir pada run sebelumnya mendapat kesempatan lagi
+        requeued = self.spool.requeue_parked()
+        if requeued:
+            logging.info(f"Retrying {requeued} parked history records")
+        # Record dari sesi sebelumnya (mis. saat MySQL mati) langsung dikirim ulang
+        self.wakeup.set()
+        while self.running:
+            self.wakeup.wait(self.backoff or self.pull_interval)
+            self.wakeup.clear()
+            self.sync_once()
+
+    def sync_once(self):
+        """Reconciles with MySQL if needed, pushes every pending batch, then pulls."""
+        if self.unconfirmed and self.pull_remote:
+            if self.pull() is None:
+                # MySQL belum bisa dibaca; push ditunda agar tidak dobel
+                self.backoff = min(max(self.backoff * 2, self.min_backoff), self.max_backoff)
+                return
+            self.unconfirmed = False
+        while self.running and self.flush_batch():
+            pass
+        if self.running and self.pull_remote and not self.backoff:
+            self.pull()
+
+    def flush_batch(self):
+        """
+        Writes one batch.
+        Returns:
+            bool: True if a full batch was written and more may be pending.
+        """
+        batch = self.spool.peek(self.batch_size)
+        if not batch:
+            return False
+        ids = [row_id for row_id, _ in batch]
+        start = time.perf_counter()
+        try:
+            self.insert_batch([record for _, record in batch])
+        except self.record_errors as e:
+            logging.warning(f"History write of {len(ids)} records failed ({e}); "
+                            f"writing them one at a time")
+            return self.flush_records(batch)
+        except Exception as e:
+            self.unconfirmed = True
+            self.retry_later(f"History write of {len(ids)} records failed ({e})", e)
+            return False
+        self.spool.mark_synced(ids)
+        self.backoff = 0.0
+        self.written += len(ids)
+        logging.info(f"Wrote {len(ids)} history records in {time.perf_counter() - start:.3f}s")
+        self.recordsWritten.emit(len(ids))
+        return len(ids) == self.batch_size
+
+    def flush_records(self, batch):
+        """
+        Writes a batch that failed with a record error, record by record.
+        A record that fails again is marked failed in the spool (and parked
+        after max_attempts); the rest of the batch is still written.
+        Returns:
+            bool: True if a full batch was written and more may be pending.
+        """
+        written = []
+        failed = 0
+        for row_id, record in batch:
+            try:
+                self.insert_batch([record])
+            except self.record_errors as e:
+                logging.error(f"History record {row_id} could not be written: {e}")
+                if self.spool.mark_failed([row_id], self.max_attempts):
+                    self.parked += 1
+                    logging.error(f"History record {row_id} failed {self.max_attempts} times; "
+                                  f"parked: {record}")
+                    self.writeFailed.emit(f"A history record could not be saved and was set aside: {e}")
+                else:
+                    failed += 1
+                    error = e
+                continue
+            except Exception as e:
+                self.unconfirmed = True
+                self.retry_later(f"History write failed ({e})", e)
+                break
+            self.spool.mark_synced([row_id])
+            written.append(row_id)
+        else:
+            if failed:
+                # Record yang gagal dicoba lagi setelah backoff, tidak langsung
+                self.retry_later(f"{failed} of {len(batch)} history records failed", error)
+            else:
+                self.backoff = 0.0
+        if written:
+            self.written += len(written)
+            self.recordsWritten.emit(len(written))
+        return len(written) == self.batch_size
+
+    def retry_later(self, message, error):
+        if not self.backoff:
+            self.writeFailed.emit(f"Could not save history, will retry: {error}")
+        self.failures += 1
+        self.backoff = min(max(self.backoff * 2, self.min_backoff), self.max_backoff)
+        logging.warning(f"{message}; retrying in {self.backoff:.1f}s")
+
+    def pull(self):
+        """
+        Pulls rows added to MySQL since the last sync, batch by batch.
+        Returns:
+            int: Number of rows new to the mirror, or None if a pull failed.
+        """
+        total = 0
+        more = True
+        failed = False
+        while self.running and more:
+            try:
+                pulled, more = self.pull_remote()
+            except Exception as e:
+                logging.warning(f"History pull failed: {e}")
+                failed = True
+                break
+            if pulled:
+                total += pulled
+                self.recordsPulled.emit(pulled)
+        if total:
+            self.pulled += total
+            logging.info(f"Pulled {total} history records")
+        return None if failed else total
+
+    def stop(self):
+        self.running = False
+        self.wakeup.set()
+        if self.wait(5000):
+            self.spool.close()
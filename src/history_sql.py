@@ -0,0 +1,131 @@
+"""
+History queries that are plain, portable SQL.
+
+MySQL (db.py) and the local SQLite mirror (history_mirror.py) run the same
+statements, the mirror only swaps the %s placeholders for ?. Nothing here
+needs a database driver, so the mirror works without mysql-connector.
+"""
+
+
+DAILY_SUMMARY_DDL = """
+    CREATE TABLE IF NOT EXISTS history_daily (
+        pc_id VARCHAR(64) NOT NULL,
+        day DATE NOT NULL,
+        mode VARCHAR(20) NOT NULL,
+        sessions INT NOT NULL DEFAULT 0,
+        total_squats INT NOT NULL DEFAULT 0,
+        squat_duration INT NOT NULL DEFAULT 0,
+        plank_active_time INT NOT NULL DEFAULT 0,
+        plank_total_time INT NOT NULL DEFAULT 0,
+        best_squat_count INT NOT NULL DEFAULT 0,
+        best_plank_active_time INT NOT NULL DEFAULT 0,
+        PRIMARY KEY (pc_id, day, mode)
+    )
+"""
+
+
+# Agregat yang sama dengan daily_rows(), dihitung dari tabel history
+DAILY_AGGREGATE_SQL = """
+    SELECT pc_id, DATE(timestamp) AS day, mode,
+           COUNT(*) AS sessions,
+           COALESCE(SUM(CASE WHEN mode = 'squat' THEN squat_count END), 0) AS total_squats,
+           COALESCE(SUM(CASE WHEN mode = 'squat' THEN squat_duration END), 0) AS squat_duration,
+           COALESCE(SUM(CASE WHEN mode <> 'squat' THEN plank_active_time END), 0) AS plank_active_time,
+           COALESCE(SUM(CASE WHEN mode <> 'squat' THEN plank_total_time END), 0) AS plank_total_time,
+           COALESCE(MAX(CASE WHEN mode = 'squat' THEN squat_count END), 0) AS best_squat_count,
+           COALESCE(MAX(CASE WHEN mode <> 'squat' THEN plank_active_time END), 0) AS best_plank_active_time
+    FROM history
+    WHERE {where}
+    GROUP BY pc_id, DATE(timestamp), mode
+"""
+
+
+def history_filter_sql(pc_id, mode=None, date_from=None, date_to=None, name=None):
+    """
+    Builds the WHERE clause shared by the history queries.
+    Args:
+        date_from: First day included ("YYYY-MM-DD" or datetime).
+        date_to: First day no longer included.
+        name (str): Case-insensitive substring of the name.
+    Returns:
+        tuple: (sql, params)
+    """
+    clauses = ["pc_id = %s"]
+    params = [pc_id]
+    if mode:
+        clauses.append("mode = %s")
+        params.append(mode)
+    if date_from:
+        clauses.append("timestamp >= %s")
+        params.append(date_from)
+    if date_to:
+        clauses.append("timestamp < %s")
+        params.append(date_to)
+    if name:
+        # Escape '!' berlaku sama di MySQL dan SQLite (mirror lokal)
+        escaped = name.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+        clauses.append("name LIKE %s ESCAPE '!'")
+        params.append(f"%{escaped}%")
+    return " AND ".join(clauses), params
+
+
+# Kolom yang boleh dipakai untuk sorting (whitelist, masuk ke SQL apa adanya)
+HISTORY_SORT_KEYS = {
+    "name": "COALESCE(name, '')",
+    "mode": "mode",
+    "metric": "CASE WHEN mode = 'squat' THEN squat_count ELSE plank_active_time END",
+    "duration": "CASE WHEN mode = 'squat' THEN squat_duration ELSE plank_total_time END",
+    "timestamp": "timestamp",
+}
+
+
+def history_page_sql(pc_id, mode, date_from, date_to, name, limit, after, sort, descending):
+    """
+    Builds the keyset-paginated SELECT of fetch_history. The SQL is portable,
+    the local SQLite mirror runs it too (with ? placeholders).
+    Returns:
+        tuple: (sql, params)
+    """
+    expression = HISTORY_SORT_KEYS[sort]
+    where, params = history_filter_sql(pc_id, mode, date_from, date_to, name)
+    if after is not None:
+        op = "<" if descending else ">"
+        where += f" AND ({expression} {op} %s OR ({expression} = %s AND id {op} %s))"
+        params += [after[0], after[0], after[1]]
+    direction = "DESC" if descending else "ASC"
+    # Satu baris ekstra untuk tahu apakah masih ada halaman berikutnya
+    sql = (f"SELECT *, {expression} AS sort_value FROM history WHERE {where} "
+           f"ORDER BY {expression} {direction}, id {direction} LIMIT %s")
+    params.append(limit + 1)
+    return sql, params
+
+
+def history_page(rows, limit):
+    """Splits the rows of a history_page_sql query into (rows, next cursor)."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1]["sort_value"], rows[-1]["id"])
+
+
+def daily_summary_sql(pc_id, mode=None, date_from=None, date_to=None, name=None):
+    """
+    Builds the query of fetch_daily_summary (portable, like history_page_sql).
+    Returns:
+        tuple: (sql, params)
+    """
+    if name:
+        where, params = history_filter_sql(pc_id, mode, date_from, date_to, name)
+        return DAILY_AGGREGATE_SQL.format(where=where), params
+    clauses = ["pc_id = %s"]
+    params = [pc_id]
+    if mode:
+        clauses.append("mode = %s")
+        params.append(mode)
+    if date_from:
+        clauses.append("day >= %s")
+        params.append(date_from)
+    if date_to:
+        clauses.append("day < %s")
+        params.append(date_to)
+    return f"SELECT * FROM history_daily WHERE {' AND '.join(clauses)}", params
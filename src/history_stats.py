@@ -0,0 +1,104 @@
+"""
+Per-day history summaries and the statistics built from them.
+
+Rows are keyed by (pc_id, day, mode) and hold sums and bests of that day's
+sessions, the same shape as the history_daily table in MySQL. The
+statistics shown under the history table only ever look at these rows, so
+their cost grows with the number of days, not sessions.
+"""
+from datetime import date, timedelta
+
+SUMMARY_FIELDS = (
+    "sessions", "total_squats", "squat_duration", "plank_active_time",
+    "plank_total_time", "best_squat_count", "best_plank_active_time",
+)
+# Kolom yang dijumlahkan; sisanya (best_*) diambil nilai terbesarnya
+SUM_FIELDS = SUMMARY_FIELDS[:5]
+
+
+def record_day(record):
+    return str(record.get("timestamp", ""))[:10]
+
+
+def daily_rows(records):
+    """
+    Groups history records into per-(pc_id, day, mode) summary rows.
+    Returns:
+        list: Dicts with pc_id, day, mode and SUMMARY_FIELDS.
+    """
+    groups = {}
+    for record in records:
+        key = (record.get("pc_id"), record_day(record), record.get("mode"))
+        row = groups.setdefault(key, dict(
+            zip(("pc_id", "day", "mode"), key), **dict.fromkeys(SUMMARY_FIELDS, 0)
+        ))
+        squat = record.get("mode") == "squat"
+        squat_count = (record.get("squat_count") or 0) if squat else 0
+        plank_active = (record.get("plank_active_time") or 0) if not squat else 0
+        row["sessions"] += 1
+        row["total_squats"] += squat_count
+        row["squat_duration"] += (record.get("squat_duration") or 0) if squat else 0
+        row["plank_active_time"] += plank_active
+        row["plank_total_time"] += (record.get("plank_total_time") or 0) if not squat else 0
+        row["best_squat_count"] = max(row["best_squat_count"], squat_count)
+        row["best_plank_active_time"] = max(row["best_plank_active_time"], plank_active)
+    return list(groups.values())
+
+
+def streaks(days, last_day=None):
+    """
+    Args:
+        days (iterable): Days ("YYYY-MM-DD" or date) with at least one session.
+        last_day (date): End of the range; the current streak must reach it
+            or the day before.
+    Returns:
+        tuple: (current streak, longest streak) in days.
+    """
+    ordered = sorted({d if isinstance(d, date) else date.fromisoformat(str(d)[:10]) for d in days})
+    longest = run = 0
+    previous = None
+    for day in ordered:
+        run = run + 1 if previous is not None and day - previous == timedelta(days=1) else 1
+        longest = max(longest, run)
+        previous = day
+    current = 0
+    if ordered:
+        last_day = last_day or date.today()
+        if last_day - ordered[-1] <= timedelta(days=1):
+            current = run
+    return current, longest
+
+
+def summarize(rows, last_day=None):
+    """
+    Builds the statistics for a filter range from its per-day summary rows.
+    Returns:
+        dict: Totals, per-mode session counts, best sessions and streaks.
+    """
+    stats = {
+        "sessions": 0, "squat_sessions": 0, "plank_sessions": 0,
+        "total_squats": 0, "total_plank_time": 0,
+        "best_squat_count": 0, "best_squat_day": None,
+        "best_plank_time": 0, "best_plank_day": None,
+    }
+    days = set()
+    # Urut per hari: kalau nilai terbaik sama, hari paling awal yang dipakai
+    for row in sorted(rows, key=lambda r: str(r["day"])[:10]):
+        sessions = int(row["sessions"] or 0)
+        if not sessions:
+            continue
+        day = str(row["day"])[:10]
+        days.add(day)
+        stats["sessions"] += sessions
+        stats["squat_sessions" if row["mode"] == "squat" else "plank_sessions"] += sessions
+        stats["total_squats"] += int(row["total_squats"] or 0)
+        stats["total_plank_time"] += int(row["plank_active_time"] or 0)
+        if int(row["best_squat_count"] or 0) > stats["best_squat_count"]:
+            stats["best_squat_count"] = int(row["best_squat_count"])
+            stats["best_squat_day"] = day
+        if int(row["best_plank_active_time"] or 0) > stats["best_plank_time"]:
+            stats["best_plank_time"] = int(row["best_plank_active_time"])
+            stats["best_plank_day"] = day
+    stats["active_days"] = len(days)
+    stats["current_streak"], stats["longest_streak"] = streaks(days, last_day)
+    return stats
@@ -1,15 +1,32 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, 
-    QRadioButton, QTableWidget, QTableWidgetItem, 
-    QHeaderView, QLabel, QPushButton, QDateEdit
+    QRadioButton, QTableView,
+    QHeaderView, QLabel, QPushButton, QDateEdit, QLineEdit
 )
-from PyQt5.QtCore import Qt, QDate
-from db import insert_history, fetch_all_history
+from datetime import date, timedelta
+from PyQt5.QtCore import Qt, QDate, QTimer
+from db import close_pool
+from history_stats import summarize
+from history_mirror import HistoryMirror
+from history_queue import HistoryWriter
+from history_model import HistoryTableModel
+
+SYNC_BATCH = 500
 
 class HistoryTab(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.history = fetch_all_history()
+        # Semua data dibaca dari mirror SQLite lokal; sinkronisasi MySQL di background
+        self.mirror = HistoryMirror()
+        self.mirror.import_spool()
+        self.writer = HistoryWriter(self.mirror)
+        self.writer.recordsPulled.connect(self.reload_history)
+        self.filters = {}
+        # Tabel baru dimuat saat tab pertama kali ditampilkan (showEvent)
+        self.loaded = False
+        # Id mirror tertinggi yang sudah ditampilkan; reload hanya mengambil baris setelahnya
+        self.watermark = 0
+        self.known_ids = set()
         self.init_ui()
         self.setup_connections()
 
@@ -80,6 +97,10 @@ class HistoryTab(QWidget):
         """)
         date_layout.addWidget(self.from_date)
         date_layout.addWidget(self.to_date)
+        self.name_filter = QLineEdit()
+        self.name_filter.setPlaceholderText("Name")
+        self.name_filter.setClearButtonEnabled(True)
+        date_layout.addWidget(self.name_filter)
         date_layout.addWidget(self.filter_button)
         date_layout.addStretch()
         self.date_group.setLayout(date_layout)
@@ -98,15 +119,16 @@ class HistoryTab(QWidget):
                 background-color: #125599;
             }
         """)
-        self.refresh_button.clicked.connect(self.reload_history)
+        self.refresh_button.clicked.connect(self.refresh)
         filter_layout.addWidget(self.refresh_button)
 
         layout.addLayout(filter_layout)
 
+        self.model = HistoryTableModel(self.mirror.fetch_history, self)
         self.table = self.create_table()
         layout.addWidget(self.table)
 
-        self.empty_label = QLabel("No history records available")
+        self.empty_label = QLabel("Loading history...")
         self.empty_label.setAlignment(Qt.AlignCenter)
         self.empty_label.setStyleSheet("""
             QLabel {
@@ -115,7 +137,7 @@ class HistoryTab(QWidget):
                 padding: 20px;
             }
         """)
-        self.empty_label.hide()
+        self.table.hide()
         layout.addWidget(self.empty_label)
 
         self.stats_label = QLabel()
@@ -125,12 +147,32 @@ class HistoryTab(QWidget):
 
         layout.addStretch()
         self.setLayout(layout)
-        self.update_table()
+
+    def start_sync(self):
+        """Starts the background MySQL sync (idempotent); main calls it after the first paint."""
+        if not self.writer.isRunning():
+            self.writer.start()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if not self.loaded:
+            # Tab digambar dulu dengan teks "Loading", data dimuat di event loop berikutnya
+            QTimer.singleShot(0, self.load_history)
+
+    def load_history(self):
+        if self.loaded:
+            return
+        self.loaded = True
+        self.empty_label.setText("No history records available")
+        self.apply_filters()
+        self.start_sync()
 
     def create_table(self):
-        table = QTableWidget()
+        # Baris dimuat per halaman saat di-scroll (canFetchMore/fetchMore di model)
+        table = QTableView()
+        table.setModel(self.model)
         table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #ddd;
                 border-radius: 5px;
                 background-color: white;
@@ -147,102 +189,134 @@ class HistoryTab(QWidget):
             }
         """)
         table.setAlternatingRowColors(True)
-        table.setSelectionBehavior(QTableWidget.SelectRows)
-        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.setSelectionBehavior(QTableView.SelectRows)
+        table.setEditTriggers(QTableView.NoEditTriggers)
         table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        # Tinggi baris tetap agar view tidak perlu mengukur setiap baris
+        table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
         table.verticalHeader().setVisible(False)
+        # Sorting dilakukan MySQL lewat model.sort()
+        table.horizontalHeader().setSortIndicator(4, Qt.DescendingOrder)
         table.setSortingEnabled(True)
         return table
 
     def setup_connections(self):
-        self.all_radio.toggled.connect(self.update_table)
-        self.squat_radio.toggled.connect(self.update_table)
-        self.plank_radio.toggled.connect(self.update_table)
-        self.filter_button.clicked.connect(self.update_table)
+        self.all_radio.toggled.connect(self.mode_toggled)
+        self.squat_radio.toggled.connect(self.mode_toggled)
+        self.plank_radio.toggled.connect(self.mode_toggled)
+        self.filter_button.clicked.connect(self.apply_filters)
+        self.name_filter.returnPressed.connect(self.apply_filters)
 
-    def add_record(self, record):
-        insert_history(record)
-        self.history = fetch_all_history()  # reload dari database setelah insert
+    def mode_toggled(self, checked):
+        # Satu pergantian mode memicu dua sinyal (uncheck + check); cukup yang check
+        if checked:
+            self.apply_filters()
+
+    def apply_filters(self):
         self.update_table()
         self.update_stats()
 
+    def add_record(self, record):
+        # Sesi baru disimpan di mirror lalu langsung tampil; MySQL menyusul di background
+        self.writer.enqueue(record)
+        self.reload_history()
+
+    def refresh(self):
+        self.writer.sync_now()
+        self.reload_history()
+
     def reload_history(self):
-        self.history = fetch_all_history()
-        self.update_table()
-        self.update_stats()
+        """Merges mirror rows added since the last reload instead of reloading everything."""
+        if not self.loaded:
+            return  # Semua baris ikut termuat saat tab pertama kali dibuka
+        rows = self.mirror.fetch_history_since(self.watermark, limit=SYNC_BATCH)
+        if len(rows) == SYNC_BATCH:
+            # Banyak baris baru (mis. sinkronisasi pertama); muat ulang halaman pertama saja
+            self.apply_filters()
+            return
+        for row in rows:
+            self.watermark = max(self.watermark, row["id"])
+            self.merge_row(row)
+        if rows:
+            self.update_stats()
 
-    def update_table(self):
+    def merge_row(self, row):
+        if row["id"] in self.known_ids:
+            return
+        self.known_ids.add(row["id"])
+        if not self.matches_filters(row, self.filters):
+            return
+        # Baris di luar halaman yang sudah dimuat muncul nanti lewat fetchMore
+        self.model.insert_record(row)
+        self.show_table()
+
+    def current_filters(self):
         if self.all_radio.isChecked():
             mode_filter = None
         elif self.squat_radio.isChecked():
             mode_filter = "squat"
         else:
             mode_filter = "plank"
+        return {
+            "mode": mode_filter,
+            "date_from": self.from_date.date().toString("yyyy-MM-dd"),
+            "date_to": self.to_date.date().addDays(1).toString("yyyy-MM-dd"),
+            "name": self.name_filter.text().strip() or None,
+        }
 
-        from_date = self.from_date.date().toString("yyyy-MM-dd")
-        to_date = self.to_date.date().addDays(1).toString("yyyy-MM-dd")
-
-        filtered = []
-        for record in self.history:
-            record_date = str(record.get("timestamp", "")).split()[0]
-            if mode_filter and record.get("mode") != mode_filter:
-                continue
-            if not (from_date <= record_date < to_date):
-                continue
-            filtered.append(record)
-
-        if not filtered:
-            self.table.hide()
-            self.empty_label.show()
-            self.update_stats()
-            return
+    @staticmethod
+    def matches_filters(record, filters):
+        """Applies the SQL filters to a single row merged by reload_history."""
+        record_date = str(record.get("timestamp", "")).split()[0]
+        if filters["mode"] and record.get("mode") != filters["mode"]:
+            return False
+        if not (filters["date_from"] <= record_date < filters["date_to"]):
+            return False
+        name = filters["name"]
+        return not name or name.lower() in str(record.get("name", "")).lower()
 
-        self.empty_label.hide()
-        self.table.show()
-        headers = ["Name", "Mode", "Count/Time", "Duration", "Date/Time"]
-        self.table.setColumnCount(len(headers))
-        self.table.setHorizontalHeaderLabels(headers)
-        self.table.setRowCount(len(filtered))
-
-        for i, record in enumerate(filtered):
-            mode = record.get("mode", "")
-            name = record.get("name", "Unknown")
-            timestamp = str(record.get("timestamp", ""))
-            if mode == "squat":
-                count = str(record.get("squat_count", 0))
-                duration = f"{record.get('squat_duration', 0)} sec"
-                metric = count
-            else:
-                active_time = str(record.get("plank_active_time", 0))
-                total_time = f"{record.get('plank_total_time', 0)} sec"
-                metric = f"{active_time} sec"
-                duration = total_time
-
-            items = [
-                QTableWidgetItem(name),
-                QTableWidgetItem(mode.capitalize()),
-                QTableWidgetItem(metric),
-                QTableWidgetItem(duration),
-                QTableWidgetItem(timestamp)
-            ]
-            for col, item in enumerate(items):
-                self.table.setItem(i, col, item)
-                if col in [2, 3]:
-                    item.setTextAlignment(Qt.AlignCenter)
-
-        self.table.sortByColumn(4, Qt.DescendingOrder)
-        self.table.resizeColumnsToContents()
-        self.update_stats()
+    def update_table(self):
+        # Filter dan sorting dijalankan di SQL (mirror); hanya halaman pertama yang diambil
+        self.filters = self.current_filters()
+        # Watermark diambil sebelum halaman pertama agar tidak ada baris yang terlewat
+        self.watermark = self.mirror.fetch_history_watermark()
+        self.model.reset(self.filters)
+        self.known_ids = set(self.model.known_ids)
+        self.show_table()
+
+    def show_table(self):
+        has_rows = self.model.rowCount() > 0
+        self.table.setVisible(has_rows)
+        self.empty_label.setVisible(not has_rows)
 
     def update_stats(self):
-        if not self.history:
+        """Statistics for the current filters, built from the mirror's per-day summary rows."""
+        filters = self.filters
+        rows = self.mirror.fetch_daily_summary(**filters)
+        # Streak saat ini dihitung sampai akhir rentang filter (maksimal hari ini)
+        last_day = min(date.today(), date.fromisoformat(filters["date_to"]) - timedelta(days=1))
+        self.show_stats(summarize(rows, last_day))
+
+    def show_stats(self, stats):
+        if not stats["sessions"]:
             self.stats_label.setText("No records available")
             return
-        total_squats = sum(r.get("squat_count", 0) for r in self.history if r.get("mode") == "squat")
-        total_plank_time = sum(r.get("plank_active_time", 0) for r in self.history if r.get("mode") == "plank")
-        stats_text = []
-        if total_squats > 0:
-            stats_text.append(f"Total Squats: {total_squats}")
-        if total_plank_time > 0:
-            stats_text.append(f"Total Plank Time: {total_plank_time} sec")
-        self.stats_label.setText(" | ".join(stats_text) if stats_text else "No exercise data")
+        stats_text = [f"Sessions: {stats['sessions']}"]
+        if stats["squat_sessions"]:
+            text = f"Squats: {stats['total_squats']} in {stats['squat_sessions']} sessions"
+            if stats["best_squat_day"]:
+                text += f" (best {stats['best_squat_count']} on {stats['best_squat_day']})"
+            stats_text.append(text)
+        if stats["plank_sessions"]:
+            text = f"Plank: {stats['total_plank_time']} sec in {stats['plank_sessions']} sessions"
+            if stats["best_plank_day"]:
+                text += f" (best {stats['best_plank_time']} sec on {stats['best_plank_day']})"
+            stats_text.append(text)
+        stats_text.append(
+            f"Streak: {stats['current_streak']} days (longest {stats['longest_streak']})"
+        )
+        self.stats_label.setText(" | ".join(stats_text))
+
+    def shutdown(self):
+        self.writer.stop()
+        close_pool()
@@ -0,0 +1,197 @@
+"""
+CPU inference backends for the pose model.
+
+The same weights can be run through PyTorch (.pt), ONNX Runtime (.onnx) or
+OpenVINO (*_openvino_model/). Ultralytics loads all three and returns the
+same Results objects, so class, confidence and keypoint outputs are
+unchanged for the rest of the pipeline. By default every available backend
+is benchmarked once per process and the fastest one is used; set
+INFERENCE_BACKEND=pytorch|onnx|openvino in .env to force one.
+
+Export the model once with:
+
+    python src/inference_backends.py --export
+"""
+import os
+import sys
+import time
+import logging
+import threading
+import importlib.util
+import numpy as np
+import model_registry
+from config_manager import resource_path
+
+MODEL_NAME = "best_yolov8new"
+BACKEND_ENV = "INFERENCE_BACKEND"
+
+# Urutan juga dipakai sebagai prioritas jika hasil benchmark sama
+BACKENDS = ("openvino", "onnx", "pytorch")
+_RUNTIME_MODULES = {"pytorch": "torch", "onnx": "onnxruntime", "openvino": "openvino"}
+
+_selected = None
+_benchmarks = {}
+_lock = threading.Lock()
+
+
+def default_model_path():
+    return resource_path(os.path.join("models", f"{MODEL_NAME}.pt"))
+
+
+def backend_model_path(name):
+    if name == "pytorch":
+        return default_model_path()
+    if name == "onnx":
+        return resource_path(os.path.join("models", f"{MODEL_NAME}.onnx"))
+    if name == "openvino":
+        return resource_path(os.path.join("models", f"{MODEL_NAME}_openvino_model"))
+    raise ValueError(f"Unknown inference backend: {name}")
+
+
+class InferenceBackend:
+    """One way of running the pose model. Wraps a model from model_registry."""
+
+    def __init__(self, name, shared=True):
+        self.name = name
+        self.model_path = backend_model_path(name)
+        # shared=False: model sendiri, untuk thread yang inferensi bersamaan
+        self.model = model_registry.get_model(self.model_path, shared=shared)
+        # Model hasil export memakai ukuran input tetap (imgsz saat export)
+        self.dynamic_imgsz = name == "pytorch"
+
+    @property
+    def names(self):
+        return self.model.names
+
+    def predict(self, frame, imgsz=640):
+        return self.model(frame, imgsz=imgsz, device="cpu", verbose=False)
+
+    def predict_batch(self, frames, imgsz=640):
+        """
+        Runs several frames (e.g. one per camera) through the model at once.
+        Returns:
+            list: One result per frame, in order.
+        """
+        if self.dynamic_imgsz:
+            return list(self.model(list(frames), imgsz=imgsz, device="cpu", verbose=False))
+        # Model hasil export dibuat dengan batch 1, jadi dijalankan per frame
+        return [self.predict(frame, imgsz)[0] for frame in frames]
+
+    def benchmark(self, iterations=10, imgsz=640):
+        """
+        Returns:
+            float: Mean latency per frame in milliseconds, after one warm-up run.
+        """
+        model_registry.warm_up(self.model_path, imgsz)
+        dummy = np.zeros((480, 640, 3), dtype=np.uint8)
+        start = time.perf_counter()
+        for _ in range(iterations):
+            self.predict(dummy, imgsz)
+        return (time.perf_counter() - start) / iterations * 1000
+
+
+def available_backends():
+    """Returns the backends whose model files and runtime are both present."""
+    names = []
+    for name in BACKENDS:
+        if not os.path.exists(backend_model_path(name)):
+            continue
+        if importlib.util.find_spec(_RUNTIME_MODULES[name]) is None:
+            continue
+        names.append(name)
+    return names
+
+
+def select_backend():
+    """
+    Chooses the backend to use: the INFERENCE_BACKEND override if it is
+    available, otherwise the fastest one measured on this machine.
+    Returns:
+        InferenceBackend
+    """
+    candidates = available_backends()
+    if not candidates:
+        raise FileNotFoundError(f"No model found for any backend ({default_model_path()})")
+
+    override = os.getenv(BACKEND_ENV, "auto").strip().lower()
+    if override in candidates:
+        backend = InferenceBackend(override)
+        model_registry.warm_up(backend.model_path)
+        logging.info(f"Inference backend forced by {BACKEND_ENV}: {override}")
+        return backend
+    if override != "auto":
+        logging.warning(f"{BACKEND_ENV}={override} is not available, choosing automatically")
+
+    if len(candidates) == 1:
+        backend = InferenceBackend(candidates[0])
+        model_registry.warm_up(backend.model_path)
+        return backend
+
+    best = None
+    for name in candidates:
+        try:
+            backend = InferenceBackend(name)
+            latency = backend.benchmark()
+        except Exception as e:
+            logging.warning(f"Inference backend {name} failed to run: {e}")
+            model_registry.release(backend_model_path(name))
+            continue
+        _benchmarks[name] = latency
+        logging.info(f"Inference backend {name}: {latency:.1f} ms/frame")
+        if best is None or latency < _benchmarks[best.name]:
+            if best is not None:
+                model_registry.release(best.model_path)
+            best = backend
+        else:
+            model_registry.release(backend.model_path)
+    if best is None:
+        raise RuntimeError("No inference backend could run the pose model")
+    logging.info(f"Selected inference backend: {best.name}")
+    return best
+
+
+def get_backend():
+    """Returns the process-wide backend, selecting it on first call."""
+    global _selected
+    with _lock:
+        if _selected is None:
+            _selected = select_backend()
+        return _selected
+
+
+def get_benchmarks():
+    """Returns the startup benchmark results in ms/frame per backend."""
+    with _lock:
+        return dict(_benchmarks)
+
+
+def preload():
+    """Selects and warms up the backend in a background thread."""
+    def _load():
+        try:
+            get_backend()
+        except Exception as e:
+            logging.error(f"Inference backend preload failed: {e}")
+
+    thread = threading.Thread(target=_load, name="backend-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def export_models(imgsz=640):
+    """Exports the .pt weights to ONNX and OpenVINO next to the original file."""
+    from ultralytics import YOLO
+    model = YOLO(default_model_path())
+    for fmt in ("onnx", "openvino"):
+        path = model.export(format=fmt, imgsz=imgsz)
+        print(f"Exported {fmt}: {path}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    if "--export" in sys.argv:
+        export_models()
+    else:
+        print(f"Available backends: {available_backends()}")
+        print(f"Selected: {get_backend().name}")
+        print(f"Benchmarks (ms/frame): {get_benchmarks()}")
@@ -0,0 +1,120 @@
+import os
+import logging
+
+DEFAULT_IMGSZ_LEVELS = (640, 480, 320)
+
+
+class AdaptiveScheduler:
+    """
+    Keeps pose inference inside a per-frame latency budget.
+    When the smoothed inference latency is over budget it first lowers imgsz
+    (640 -> 480 -> 320), then starts skipping frames (infer every Nth frame).
+    With enough headroom it undoes those steps in reverse order.
+    """
+
+    def __init__(self, budget_ms=None, imgsz_levels=DEFAULT_IMGSZ_LEVELS,
+                 dynamic_imgsz=True, max_stride=4, window=15, headroom=0.8):
+        if budget_ms is None:
+            budget_ms = float(os.getenv("FRAME_BUDGET_MS", "66"))
+        self.budget_ms = budget_ms
+        # Model hasil export (ONNX/OpenVINO) hanya menerima ukuran input tetap
+        self.imgsz_levels = tuple(imgsz_levels) if dynamic_imgsz else tuple(imgsz_levels[:1])
+        self.max_stride = max_stride
+        self.window = window
+        self.headroom = headroom
+
+        self.level = 0
+        self.stride = 1
+        self.frame_index = 0
+        self.samples = 0
+        self.latency_ms = None
+        self.inferred_frames = 0
+        self.skipped_frames = 0
+        # Frame yang keypoint-nya dari optical flow (KeypointTracker), bukan dari model
+        self.tracked_frames = 0
+        self.steps_down = 0
+        self.steps_up = 0
+
+    @property
+    def imgsz(self):
+        return self.imgsz_levels[self.level]
+
+    def should_infer(self):
+        """Call once per frame; False means reuse the previous results."""
+        infer = self.frame_index % self.stride == 0
+        self.frame_index += 1
+        if infer:
+            self.count_inference()
+        else:
+            self.skipped_frames += 1
+        return infer
+
+    def count_inference(self):
+        """Counts a frame that went through the model (called by should_infer or the tracker path)."""
+        self.inferred_frames += 1
+
+    def count_tracked(self):
+        """Counts a frame whose pose was tracked with optical flow instead of inferred."""
+        self.tracked_frames += 1
+
+    def record(self, latency_ms):
+        """Feeds one inference latency and adjusts imgsz/stride when needed."""
+        if self.latency_ms is None:
+            self.latency_ms = latency_ms
+        else:
+            self.latency_ms = 0.8 * self.latency_ms + 0.2 * latency_ms
+        self.samples += 1
+        if self.samples < self.window:
+            return
+
+        # Biaya per frame = latency inferensi dibagi stride
+        frame_cost = self.latency_ms / self.stride
+        if frame_cost > self.budget_ms:
+            self.step_down()
+        elif self.can_step_up(frame_cost):
+            self.step_up()
+
+    def can_step_up(self, frame_cost):
+        if self.stride > 1:
+            predicted = self.latency_ms / (self.stride - 1)
+        elif self.level > 0:
+            scale = self.imgsz_levels[self.level - 1] / self.imgsz
+            predicted = frame_cost * scale * scale
+        else:
+            return False
+        return predicted < self.budget_ms * self.headroom
+
+    def step_down(self):
+        if self.level < len(self.imgsz_levels) - 1:
+            self.level += 1
+            self.latency_ms *= (self.imgsz / self.imgsz_levels[self.level - 1]) ** 2
+        elif self.stride < self.max_stride:
+            self.stride += 1
+        else:
+            return
+        self.steps_down += 1
+        self.samples = 0
+        logging.info(f"Scheduler over budget: imgsz={self.imgsz}, stride={self.stride}")
+
+    def step_up(self):
+        if self.stride > 1:
+            self.stride -= 1
+        else:
+            self.level -= 1
+            self.latency_ms *= (self.imgsz / self.imgsz_levels[self.level + 1]) ** 2
+        self.steps_up += 1
+        self.samples = 0
+        logging.info(f"Scheduler has headroom: imgsz={self.imgsz}, stride={self.stride}")
+
+    def metrics(self):
+        return {
+            "imgsz": self.imgsz,
+            "stride": self.stride,
+            "latency_ms": round(self.latency_ms or 0.0, 1),
+            "budget_ms": self.budget_ms,
+            "inferred_frames": self.inferred_frames,
+            "skipped_frames": self.skipped_frames,
+            "tracked_frames": self.tracked_frames,
+            "steps_down": self.steps_down,
+            "steps_up": self.steps_up,
+        }
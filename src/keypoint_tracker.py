@@ -0,0 +1,95 @@
+import cv2
+import numpy as np
+
+LK_PARAMS = dict(
+    winSize=(21, 21),
+    maxLevel=3,
+    criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03),
+)
+
+
+class KeypointTracker:
+    """
+    Carries the best person's keypoints from one model run to the next with
+    pyramidal Lucas-Kanade optical flow, so the pose model only has to run
+    every `interval` frames. Tracking confidence is the share of the
+    keypoints from the last model run that are still tracked reliably; when
+    it drops below min_confidence the model is asked to run early.
+    """
+
+    def __init__(self, interval=4, min_confidence=0.6, max_error=30.0):
+        self.interval = interval
+        self.min_confidence = min_confidence
+        self.max_error = max_error
+        self.model_runs = 0
+        self.tracked_frames = 0
+        self.early_runs = 0
+        self.reset()
+
+    def reset(self):
+        self.prev_gray = None
+        self.detection = None
+        self.initial_points = 0
+        self.frames_since_model = 0
+        self.lost = True
+
+    def due(self):
+        """True if the next frame should go through the pose model."""
+        return self.lost or self.frames_since_model + 1 >= self.interval
+
+    def start(self, gray, detection):
+        """Takes a fresh model detection as the new tracking reference."""
+        self.model_runs += 1
+        self.frames_since_model = 0
+        self.prev_gray = gray
+        self.detection = detection
+        if detection is None or detection.keypoints is None:
+            self.lost = True
+            return
+        visible = (np.asarray(detection.keypoints) != 0).any(axis=1)
+        self.initial_points = int(visible.sum())
+        self.lost = self.initial_points < 4
+
+    def track(self, gray):
+        """
+        Moves the reference keypoints into the current frame.
+        Returns:
+            PoseDetection with tracked keypoints and box, or None if tracking
+            confidence dropped (the caller should run the model instead).
+        """
+        keypoints = np.array(self.detection.keypoints, dtype=np.float32)
+        visible = (keypoints != 0).any(axis=1)
+        points = keypoints[visible].reshape(-1, 1, 2)
+        new_points, status, error = cv2.calcOpticalFlowPyrLK(
+            self.prev_gray, gray, points, None, **LK_PARAMS
+        )
+        ok = (status.ravel() == 1) & (error.ravel() < self.max_error)
+        confidence = ok.sum() / max(self.initial_points, 1)
+        if confidence < self.min_confidence:
+            self.lost = True
+            self.early_runs += 1
+            return None
+
+        moved = new_points.reshape(-1, 2)
+        shift = np.median(moved[ok] - points.reshape(-1, 2)[ok], axis=0)
+        tracked = np.zeros_like(keypoints)
+        # Keypoint yang gagal dilacak disembunyikan (0, 0) agar tidak digambar salah
+        tracked[np.flatnonzero(visible)[ok]] = moved[ok]
+        box = np.asarray(self.detection.box, dtype=np.float32).copy()
+        box[:4] += np.tile(shift, 2)
+
+        self.detection = self.detection._replace(keypoints=tracked, box=box)
+        self.prev_gray = gray
+        self.frames_since_model += 1
+        self.tracked_frames += 1
+        return self.detection
+
+    def stats(self):
+        total = self.model_runs + self.tracked_frames
+        return {
+            "interval": self.interval,
+            "model_runs": self.model_runs,
+            "tracked_frames": self.tracked_frames,
+            "early_runs": self.early_runs,
+            "model_run_ratio": round(self.model_runs / total, 3) if total else 0.0,
+        }
@@ -1,7 +1,13 @@
+import startup
 import sys
-from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget, QStatusBar
+import logging
+import multiprocessing
+from PyQt5.QtCore import QTimer
+from PyQt5.QtWidgets import QApplication, QMainWindow, QTabWidget, QStatusBar, QLabel, QProgressBar
 from counter_tab import CounterTab
 from history_tab import HistoryTab
+# torch/ultralytics/cv2 tidak di-import di sini; dimuat startup.ModuleLoader setelah jendela tampil
+startup.profile.mark("imports")
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -20,6 +26,14 @@ class MainWindow(QMainWindow):
         self.setCentralWidget(self.tab_widget)
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
+        # Live FPS and per-stage latency of the detection pipeline
+        self.pipeline_label = QLabel()
+        self.pipeline_label.setStyleSheet("color: #555; font-size: 11px;")
+        self.status_bar.addPermanentWidget(self.pipeline_label)
+        self.loading_bar = QProgressBar()
+        self.loading_bar.setMaximumWidth(200)
+        self.loading_bar.setTextVisible(True)
+        self.status_bar.addPermanentWidget(self.loading_bar)
         self.setStyleSheet("""
             QMainWindow {
                 background-color: #f5f5f5;
@@ -52,14 +66,43 @@ class MainWindow(QMainWindow):
     def setup_connections(self):
         self.counter_tab.sessionFinished.connect(self.history_tab.add_record)
         self.counter_tab.errorOccurred.connect(self.show_status_message)
+        self.counter_tab.pipelineStatsUpdated.connect(self.pipeline_label.setText)
+        self.history_tab.writer.writeFailed.connect(self.show_status_message)
+        self.loader = startup.module_loader()
+        self.loader.progress.connect(self.show_loading_progress)
+        self.loader.loadFailed.connect(self.show_status_message)
+        self.paint_watcher = startup.FirstPaintWatcher(self)
+        self.paint_watcher.painted.connect(self.on_first_paint)
+
+    def on_first_paint(self, elapsed):
+        logging.info(f"Main window painted {elapsed * 1000:.0f} ms after start")
+        self.show_status_message(f"Ready in {elapsed * 1000:.0f} ms")
+        # Beri event loop kesempatan menyelesaikan paint sebelum kerja background dimulai
+        QTimer.singleShot(0, self.start_background_work)
+
+    def start_background_work(self):
+        self.loader.start_once()
+        self.history_tab.start_sync()
+
+    def show_loading_progress(self, percent, step):
+        self.loading_bar.setValue(percent)
+        self.loading_bar.setFormat(f"{step} %p%")
+        self.loading_bar.setVisible(percent < 100)
 
     def show_status_message(self, message):
         self.status_bar.showMessage(message, 5000)
 
+    def closeEvent(self, event):
+        self.history_tab.shutdown()
+        super().closeEvent(event)
+
 if __name__ == '__main__':
+    multiprocessing.freeze_support()
+    logging.basicConfig(level=logging.INFO)
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
     window = MainWindow()
+    startup.profile.mark("window built")
     window.show()
     try:
         sys.exit(app.exec_())
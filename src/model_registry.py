@@ -0,0 +1,102 @@
+import time
+import logging
+import threading
+import numpy as np
+from ultralytics import YOLO
+
+# Satu instance model per file weights untuk seluruh proses
+_models = {}
+_stats = {}
+_lock = threading.RLock()
+
+
+def get_model(model_path, task="pose", shared=True):
+    """
+    Returns the shared YOLO model for a weights file, loading it on first use.
+    Concurrent callers for the same path wait for the single load in progress.
+    An ultralytics model is not safe to call from several threads at once, so
+    threads that run inference concurrently each need their own instance
+    (shared=False).
+    Args:
+        model_path (str): Path to the weights file or exported model.
+        task (str): Ultralytics task, needed for exported ONNX/OpenVINO models.
+        shared (bool): False loads a new instance that is not kept in the registry.
+    Returns:
+        YOLO: The loaded model.
+    """
+    if not shared:
+        start = time.perf_counter()
+        model = YOLO(model_path, task=task)
+        logging.info(f"Private model loaded from {model_path} in {time.perf_counter() - start:.2f}s")
+        return model
+    with _lock:
+        model = _models.get(model_path)
+        if model is None:
+            start = time.perf_counter()
+            model = YOLO(model_path, task=task)
+            load_time = time.perf_counter() - start
+            _models[model_path] = model
+            _stats.setdefault(model_path, {})["load_time"] = load_time
+            logging.info(f"Model loaded from {model_path} in {load_time:.2f}s")
+        return model
+
+
+def release(model_path):
+    """
+    Drops the registry's reference to a model, e.g. a backend that lost the
+    startup benchmark, so its memory is freed once no caller holds it.
+    """
+    with _lock:
+        if _models.pop(model_path, None) is not None:
+            # Jika dimuat lagi nanti, model baru perlu warm-up lagi
+            _stats.get(model_path, {}).pop("warmup_time", None)
+            logging.info(f"Model released: {model_path}")
+
+
+def warm_up(model_path, imgsz=640):
+    """
+    Runs one inference on a blank frame so the first real frame is not slow.
+    The registry lock is held throughout, so a DetectionThread asking for the
+    model meanwhile waits for the warmed-up predictor instead of racing it.
+    """
+    dummy = np.zeros((480, 640, 3), dtype=np.uint8)
+    with _lock:
+        model = get_model(model_path)
+        if "warmup_time" in _stats[model_path]:
+            return
+        start = time.perf_counter()
+        model(dummy, imgsz=imgsz, verbose=False)
+        warmup_time = time.perf_counter() - start
+        _stats[model_path]["warmup_time"] = warmup_time
+    logging.info(f"Model warm-up for {model_path} took {warmup_time:.2f}s")
+
+
+def preload(model_path, imgsz=640):
+    """
+    Loads and warms up a model in a background thread.
+    Returns:
+        threading.Thread: The started loader thread.
+    """
+    def _load():
+        try:
+            warm_up(model_path, imgsz)
+        except Exception as e:
+            logging.error(f"Model preload failed for {model_path}: {e}")
+
+    thread = threading.Thread(target=_load, name="model-preload", daemon=True)
+    thread.start()
+    return thread
+
+
+def get_stats(model_path=None):
+    """
+    Returns load and warm-up times in seconds.
+    Args:
+        model_path (str, optional): Only return the entry for this path.
+    Returns:
+        dict: {"load_time": float, "warmup_time": float} per path (or for one path).
+    """
+    with _lock:
+        if model_path is not None:
+            return dict(_stats.get(model_path, {}))
+        return {path: dict(values) for path, values in _stats.items()}
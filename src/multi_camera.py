@@ -0,0 +1,298 @@
+"""
+One detection worker for stations with several cameras.
+
+Instead of one DetectionThread per camera, each competing for the same CPU
+cores, MultiCameraDetectionThread takes the newest frame from every
+registered source and runs them through the model in one batched call.
+Results are routed back to each camera's own counter and frame signal.
+
+Compare against independent threads on the same inputs:
+
+    python src/multi_camera.py squat synthetic synthetic synthetic
+"""
+import time
+import queue
+import logging
+from PyQt5.QtCore import QThread, QTimer, Qt, pyqtSignal
+from PyQt5.QtGui import QImage
+import inference_backends
+import pose_postprocess
+from frame_capture import LatestFrameBuffer, CaptureThread
+from inference_scheduler import AdaptiveScheduler, DEFAULT_IMGSZ_LEVELS
+from pipeline_metrics import create_metrics
+from exercise_counter import ExerciseCounter
+from frame_delivery import FrameRenderer, FrameMailbox, display_interval_ms
+
+
+class CameraChannel:
+    """Per-camera state: source, frame buffer, counter and display mailbox."""
+
+    def __init__(self, index, source, mode):
+        self.index = index
+        self.source = source
+        self.mode = mode
+        self.counter = ExerciseCounter(mode)
+        self.buffer = None
+        self.capture_thread = None
+        self.renderer = None
+        self.mailbox = FrameMailbox()
+        self.last_detection = None
+        self.finished = False
+
+    def stats(self):
+        stats = {"source": self.source.name, "mode": self.mode}
+        if self.buffer:
+            stats["frames"] = self.buffer.stats()
+        stats["display"] = self.mailbox.stats()
+        return stats
+
+
+class MultiCameraDetectionThread(QThread):
+    # Semua sinyal membawa index kamera sebagai argumen pertama
+    updateData = pyqtSignal(int, dict)
+    updateFrame = pyqtSignal(int, QImage)
+    errorOccurred = pyqtSignal(str)
+    updateStats = pyqtSignal(dict)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.channels = []
+        self.emit_frames = True
+        self.running = False
+        self.threshold = 0.5
+        self.backend = None
+        self.model = None
+        # Seperti DetectionThread: scheduler hanya jika semua sumber realtime,
+        # selain itu imgsz tetap agar hasil sebanding dengan thread terpisah
+        self.scheduler = None
+        self.imgsz = DEFAULT_IMGSZ_LEVELS[0]
+        self.metrics = create_metrics()
+        self.batches = 0
+        self.batched_frames = 0
+        self.commands = queue.Queue()
+        self.frame_timer = QTimer(self)
+        self.frame_timer.setTimerType(Qt.PreciseTimer)
+        self.frame_timer.setInterval(display_interval_ms())
+        self.frame_timer.timeout.connect(self.deliver_frames)
+        self.started.connect(self.frame_timer.start)
+        self.finished.connect(self.frame_timer.stop)
+
+    def add_source(self, source, mode="squat"):
+        """
+        Registers a camera (or any FrameSource) before start().
+        Returns:
+            int: Camera index used in the signals and commands.
+        """
+        channel = CameraChannel(len(self.channels), source, mode)
+        self.channels.append(channel)
+        return channel.index
+
+    def set_mode(self, camera, mode):
+        self.commands.put(("mode", camera, mode))
+
+    def enable_start(self, camera=None):
+        """Starts counting on one camera, or on all of them if camera is None."""
+        self.commands.put(("start", camera, None))
+
+    def stop_counting(self, camera=None):
+        self.commands.put(("preview", camera, None))
+
+    def process_commands(self, current_time):
+        while True:
+            try:
+                command, camera, value = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            channels = self.channels if camera is None else [self.channels[camera]]
+            for channel in channels:
+                if command == "mode":
+                    channel.mode = value
+                    channel.counter.mode = value
+                    channel.counter.stop()
+                    channel.counter.reset()
+                elif command == "start":
+                    channel.counter.start(current_time)
+                elif command == "preview":
+                    channel.counter.stop()
+
+    def run(self):
+        try:
+            self.backend = inference_backends.get_backend()
+            self.model = self.backend.model
+        except Exception as e:
+            self.errorOccurred.emit(f"Failed to load model: {str(e)}")
+            return
+
+        for channel in self.channels:
+            if not channel.source.open():
+                self.errorOccurred.emit(f"Could not open {channel.source.name}")
+                channel.finished = True
+                continue
+            channel.buffer = LatestFrameBuffer(lossless=not channel.source.realtime)
+            channel.capture_thread = CaptureThread(channel.source, channel.buffer)
+            channel.capture_thread.start()
+
+        self.running = True
+        if self.channels and all(channel.source.realtime for channel in self.channels):
+            self.scheduler = AdaptiveScheduler(dynamic_imgsz=self.backend.dynamic_imgsz)
+        try:
+            while self.running:
+                stage_start = self.metrics.now()
+                batch = self.gather_frames()
+                if batch is None:
+                    break  # Semua sumber sudah habis
+                if not batch:
+                    self.msleep(2)
+                    continue
+                self.metrics.record("capture", stage_start)
+                self.process_commands(max(timestamp for _, _, timestamp in batch))
+                self.process_batch(batch)
+                if self.metrics.report_due():
+                    self.updateStats.emit(self.pipeline_stats())
+        except Exception as e:
+            logging.error(f"Multi-camera detection error: {e}")
+            self.errorOccurred.emit(f"Detection error: {str(e)}")
+        finally:
+            for channel in self.channels:
+                if channel.capture_thread:
+                    channel.capture_thread.stop()
+                channel.source.release()
+            logging.info(f"Multi-camera detection stopped: {self.pipeline_stats()['batching']}")
+
+    def gather_frames(self):
+        """
+        Takes the newest frame of every camera that has one, without waiting.
+        Returns:
+            list: (channel, frame, timestamp) tuples, or None once every source
+            has ended.
+        """
+        batch = []
+        for channel in self.channels:
+            if channel.finished:
+                continue
+            item = channel.buffer.get(timeout=0)
+            if item is not None:
+                batch.append((channel, *item))
+            elif channel.buffer.exhausted():
+                channel.finished = True
+        if not batch and all(channel.finished for channel in self.channels):
+            return None
+        return batch
+
+    def process_batch(self, batch):
+        start = time.perf_counter()
+        imgsz = self.scheduler.imgsz if self.scheduler else self.imgsz
+        results = self.backend.predict_batch([frame for _, frame, _ in batch], imgsz=imgsz)
+        if self.scheduler:
+            self.scheduler.record((time.perf_counter() - start) * 1000)
+        self.metrics.record("inference", start)
+        self.batches += 1
+        self.batched_frames += len(batch)
+
+        for (channel, frame, timestamp), result in zip(batch, results):
+            stage_start = self.metrics.now()
+            annotated_frame, detection, _ = pose_postprocess.process_detections(
+                frame, [result], self.model.names, self.threshold
+            )
+            channel.last_detection = detection
+            self.metrics.record("postprocess", stage_start)
+
+            stage_start = self.metrics.now()
+            if detection is None:
+                data = channel.counter.update(timestamp, None, 0.0)
+            else:
+                data = channel.counter.update(timestamp, detection.class_name, detection.conf * 100)
+            if channel.counter.counting:
+                if "warning" in data:
+                    channel.counter.stop()
+                self.updateData.emit(channel.index, data)
+            self.metrics.record("counting", stage_start)
+
+            if self.emit_frames:
+                stage_start = self.metrics.now()
+                if channel.renderer is None:
+                    channel.renderer = FrameRenderer()
+                slot, q_img = channel.renderer.render(annotated_frame, channel.mailbox.busy_slots())
+                channel.mailbox.post(slot, q_img)
+                self.metrics.record("render", stage_start)
+            self.metrics.frame_done()
+
+    def deliver_frames(self):
+        """Runs on the GUI thread at display rate; one newest frame per camera."""
+        for channel in self.channels:
+            q_img = channel.mailbox.take()
+            if q_img is not None:
+                self.updateFrame.emit(channel.index, q_img)
+
+    def pipeline_stats(self):
+        stats = self.metrics.snapshot()
+        stats["cameras"] = [channel.stats() for channel in self.channels]
+        stats["scheduler"] = self.scheduler.metrics() if self.scheduler else {}
+        stats["batching"] = {
+            "batches": self.batches,
+            "frames": self.batched_frames,
+            "mean_batch_size": round(self.batched_frames / self.batches, 2) if self.batches else 0.0,
+        }
+        stats["summary"] = self.metrics.summary_text(stats)
+        return stats
+
+    def stop(self):
+        self.running = False
+        self.wait(2000)
+
+
+def compare_with_threads(mode, specs):
+    """
+    Processes the same sources once with independent DetectionThreads running
+    side by side and once with a single batched worker. Each thread gets its
+    own model instance, since one ultralytics model must not run inference
+    from several threads at once.
+    Returns:
+        dict: Total frames per second for "threads" and "batched".
+    """
+    import threading
+    from detection_thread import DetectionThread
+    from frame_source import open_source
+
+    selected = inference_backends.get_backend()
+    workers = []
+    for spec in specs:
+        worker = DetectionThread(mode=mode, source=open_source(spec))
+        worker.backend = inference_backends.InferenceBackend(selected.name, shared=False)
+        worker.emit_frames = False
+        worker.enable_start()
+        workers.append(worker)
+    threads = [threading.Thread(target=worker.run) for worker in workers]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    frames = sum(worker.frame_stats().get("consumed", 0) for worker in workers)
+    threads_fps = frames / elapsed if elapsed else 0.0
+
+    batched = MultiCameraDetectionThread()
+    batched.emit_frames = False
+    for spec in specs:
+        batched.add_source(open_source(spec), mode)
+    batched.enable_start()
+    start = time.perf_counter()
+    batched.run()
+    elapsed = time.perf_counter() - start
+    frames = batched.pipeline_stats()["batching"]["frames"]
+    batched_fps = frames / elapsed if elapsed else 0.0
+    return {"threads": round(threads_fps, 1), "batched": round(batched_fps, 1)}
+
+
+if __name__ == "__main__":
+    import sys
+    from PyQt5.QtCore import QCoreApplication
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) < 3:
+        print(__doc__)
+        sys.exit(1)
+    app = QCoreApplication(sys.argv)
+    result = compare_with_threads(sys.argv[1], sys.argv[2:])
+    print(f"{len(sys.argv) - 2} sources: {result['threads']} fps with independent threads, "
+          f"{result['batched']} fps batched")
@@ -0,0 +1,62 @@
+class PersonROI:
+    """
+    Region-of-interest search for fixed-camera setups.
+    After a detection, the next inference only looks at the previous box
+    plus a margin, at a smaller imgsz. After `lost_after` inferences without
+    a detection it falls back to searching the full frame.
+    """
+
+    def __init__(self, margin=0.3, imgsz=320, min_size=192, lost_after=1):
+        self.margin = margin
+        self.imgsz = imgsz
+        self.min_size = min_size
+        self.lost_after = lost_after
+        self.box = None
+        self.misses = 0
+        self.roi_inferences = 0
+        self.full_inferences = 0
+        self.fallbacks = 0
+
+    def region(self, frame_shape):
+        """
+        Returns:
+            tuple: (x1, y1, x2, y2) crop in frame pixels, or None for full frame.
+        """
+        if self.box is None:
+            self.full_inferences += 1
+            return None
+        frame_height, frame_width = frame_shape[:2]
+        x1, y1, x2, y2 = (float(v) for v in self.box[:4])
+        width = max(x2 - x1, 1.0) * (1 + 2 * self.margin)
+        height = max(y2 - y1, 1.0) * (1 + 2 * self.margin)
+        width = min(max(width, self.min_size), frame_width)
+        height = min(max(height, self.min_size), frame_height)
+        cx, cy = (x1 + x2) / 2, (y1 + y2) / 2
+        left = int(min(max(cx - width / 2, 0), frame_width - width))
+        top = int(min(max(cy - height / 2, 0), frame_height - height))
+        right, bottom = left + int(width), top + int(height)
+        # Jika ROI hampir seluruh frame, lebih murah langsung pakai frame penuh
+        if (right - left) * (bottom - top) > 0.8 * frame_width * frame_height:
+            self.full_inferences += 1
+            return None
+        self.roi_inferences += 1
+        return left, top, right, bottom
+
+    def update(self, detection):
+        """Feeds the best detection (full-frame coordinates) of a fresh inference."""
+        if detection is not None:
+            self.box = detection.box
+            self.misses = 0
+            return
+        self.misses += 1
+        if self.box is not None and self.misses >= self.lost_after:
+            self.box = None
+            self.fallbacks += 1
+
+    def stats(self):
+        return {
+            "imgsz": self.imgsz,
+            "roi_inferences": self.roi_inferences,
+            "full_inferences": self.full_inferences,
+            "fallbacks": self.fallbacks,
+        }
@@ -0,0 +1,89 @@
+import numpy as np
+
+
+def box_iou(boxes_a, boxes_b):
+    """
+    Pairwise IoU of two sets of x1, y1, x2, y2 boxes.
+    Returns:
+        np.ndarray: (len(boxes_a), len(boxes_b)) matrix.
+    """
+    a = np.asarray(boxes_a, dtype=np.float32).reshape(-1, 4)[:, None]
+    b = np.asarray(boxes_b, dtype=np.float32).reshape(-1, 4)[None]
+    width = np.clip(np.minimum(a[..., 2], b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    height = np.clip(np.minimum(a[..., 3], b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = width * height
+    area_a = (a[..., 2] - a[..., 0]) * (a[..., 3] - a[..., 1])
+    area_b = (b[..., 2] - b[..., 0]) * (b[..., 3] - b[..., 1])
+    return intersection / np.maximum(area_a + area_b - intersection, 1e-6)
+
+
+class PersonTracker:
+    """
+    Gives every person a persistent track id across frames by matching this
+    frame's boxes to the previous ones on IoU (greedy, best overlap first).
+    A track that goes unmatched for more than lost_after seconds is dropped;
+    a person who comes back after that gets a new id.
+    """
+
+    def __init__(self, min_iou=0.3, lost_after=2.0, max_tracks=8):
+        self.min_iou = min_iou
+        self.lost_after = lost_after
+        self.max_tracks = max_tracks
+        self.next_id = 1
+        self.boxes = {}       # track id -> last box
+        self.last_seen = {}   # track id -> timestamp
+        self.created = 0
+        self.dropped = 0
+
+    def reset(self):
+        self.boxes.clear()
+        self.last_seen.clear()
+
+    def update(self, timestamp, detections):
+        """
+        Args:
+            timestamp (float): Frame time in seconds.
+            detections (list): PoseDetection objects of this frame.
+        Returns:
+            tuple: (matched, lost). matched maps track id to this frame's
+            detection; lost lists the ids dropped in this call.
+        """
+        matched = {}
+        track_ids = list(self.boxes)
+        unmatched = list(range(len(detections)))
+        if track_ids and detections:
+            iou = box_iou([self.boxes[t] for t in track_ids], [d.box[:4] for d in detections])
+            # Pasangan dengan overlap terbesar dipasangkan lebih dulu
+            for flat in np.argsort(iou, axis=None)[::-1].tolist():
+                row, col = divmod(flat, len(detections))
+                if iou[row, col] < self.min_iou:
+                    break
+                if track_ids[row] in matched or col not in unmatched:
+                    continue
+                matched[track_ids[row]] = detections[col]
+                unmatched.remove(col)
+
+        capacity = max(self.max_tracks - len(self.boxes), 0)
+        for col in unmatched[:capacity]:
+            track_id = self.next_id
+            self.next_id += 1
+            self.created += 1
+            matched[track_id] = detections[col]
+
+        for track_id, detection in matched.items():
+            self.boxes[track_id] = np.asarray(detection.box[:4], dtype=np.float32)
+            self.last_seen[track_id] = timestamp
+
+        lost = [t for t, seen in self.last_seen.items() if timestamp - seen > self.lost_after]
+        for track_id in lost:
+            del self.boxes[track_id]
+            del self.last_seen[track_id]
+            self.dropped += 1
+        return matched, lost
+
+    def stats(self):
+        return {
+            "active_tracks": len(self.boxes),
+            "tracks_created": self.created,
+            "tracks_dropped": self.dropped,
+        }
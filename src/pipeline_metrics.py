@@ -0,0 +1,152 @@
+import os
+import json
+import time
+import logging
+import itertools
+from collections import deque
+from datetime import datetime
+
+STAGES = ("capture", "inference", "tracking", "postprocess", "counting", "render", "delivery")
+
+# Nomor urut dump dalam proses ini; nama file tetap unik walau dua sesi selesai di ms yang sama
+_dump_ids = itertools.count(1)
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class PipelineMetrics:
+    """
+    Per-stage latency samples and FPS for one detection session.
+    Recording a sample is one perf_counter() call and a deque append;
+    percentiles are only computed when a snapshot is requested.
+    """
+    enabled = True
+
+    def __init__(self, window=1000, report_interval=1.0):
+        self.window = window
+        self.report_interval = report_interval
+        self.reset()
+
+    def reset(self):
+        """Starts a new session: drops all samples and restarts the clock."""
+        self.samples = {stage: deque(maxlen=self.window) for stage in STAGES}
+        self.counts = dict.fromkeys(STAGES, 0)
+        self.frame_times = deque(maxlen=120)
+        self.last_report = time.perf_counter()
+        self.started_at = datetime.now()
+
+    @staticmethod
+    def now():
+        return time.perf_counter()
+
+    def record(self, stage, start):
+        """Records the time since `start` (from now()) for a stage, in ms."""
+        self.samples[stage].append((time.perf_counter() - start) * 1000)
+        self.counts[stage] += 1
+
+    def frame_done(self):
+        self.frame_times.append(time.perf_counter())
+
+    def fps(self):
+        if len(self.frame_times) < 2:
+            return 0.0
+        span = self.frame_times[-1] - self.frame_times[0]
+        return (len(self.frame_times) - 1) / span if span > 0 else 0.0
+
+    def report_due(self):
+        """True about once per report_interval; used to throttle live updates."""
+        now = time.perf_counter()
+        if now - self.last_report < self.report_interval:
+            return False
+        self.last_report = now
+        return True
+
+    def snapshot(self):
+        stages = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                continue
+            values = sorted(samples)
+            stages[stage] = {
+                "p50": round(percentile(values, 0.50), 2),
+                "p95": round(percentile(values, 0.95), 2),
+                "p99": round(percentile(values, 0.99), 2),
+                "count": self.counts[stage],
+            }
+        return {"fps": round(self.fps(), 1), "stages": stages}
+
+    def summary_text(self, snapshot=None):
+        """Short one-line form for the status bar."""
+        snapshot = snapshot or self.snapshot()
+        parts = [f"FPS {snapshot['fps']:.1f}"]
+        for stage, values in snapshot["stages"].items():
+            parts.append(f"{stage} {values['p50']:.1f}/{values['p95']:.1f} ms")
+        return " | ".join(parts)
+
+    def dump(self, directory=None, extra=None):
+        """
+        Writes the current snapshot as JSON.
+        Returns:
+            str: Path of the written file, or None if writing failed.
+        """
+        directory = directory or os.getenv("PIPELINE_METRICS_DIR", "logs")
+        data = self.snapshot()
+        data["started_at"] = self.started_at.strftime("%Y-%m-%d %H:%M:%S")
+        now = datetime.now()
+        data["dumped_at"] = now.strftime("%Y-%m-%d %H:%M:%S")
+        if extra:
+            data.update(extra)
+        path = os.path.join(
+            directory,
+            f"pipeline_metrics_{now.strftime('%Y%m%d_%H%M%S_%f')[:-3]}_{os.getpid()}_{next(_dump_ids)}.json",
+        )
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+        except OSError as e:
+            logging.error(f"Could not write pipeline metrics: {e}")
+            return None
+        return path
+
+
+class NullMetrics:
+    """Drop-in replacement used when instrumentation is turned off."""
+    enabled = False
+
+    @staticmethod
+    def now():
+        return 0.0
+
+    def record(self, stage, start):
+        pass
+
+    def frame_done(self):
+        pass
+
+    def reset(self):
+        pass
+
+    def report_due(self):
+        return False
+
+    def snapshot(self):
+        return {"fps": 0.0, "stages": {}}
+
+    def summary_text(self, snapshot=None):
+        return ""
+
+    def dump(self, directory=None, extra=None):
+        return None
+
+
+def create_metrics():
+    """Returns PipelineMetrics, or NullMetrics if PIPELINE_METRICS=0."""
+    if os.getenv("PIPELINE_METRICS", "1").strip().lower() in ("0", "false", "off", "no"):
+        return NullMetrics()
+    return PipelineMetrics()
@@ -0,0 +1,196 @@
+"""
+Compact per-session pose logs.
+
+Each session is a directory with one raw little-endian file per column plus
+meta.json describing dtypes and shapes:
+
+    timestamp.bin   float64  (N,)
+    class_id.bin    int16    (N,)      -1 = no detection
+    conf.bin        float32  (N,)      0-1, before the detection threshold
+    box.bin         float32  (N, 4)    x1, y1, x2, y2
+    keypoints.bin   float32  (N, K, 2)
+
+Rows are only ever appended, so load_pose_log() can memory-map every column
+without copying, and a log cut short by a crash is still readable up to the
+last complete row.
+"""
+import os
+import json
+import queue
+import logging
+import itertools
+import threading
+from datetime import datetime
+import numpy as np
+from pose_postprocess import NUM_KEYPOINTS
+
+COLUMNS = {
+    "timestamp": ("<f8", ()),
+    "class_id": ("<i2", ()),
+    "conf": ("<f4", ()),
+    "box": ("<f4", (4,)),
+    "keypoints": ("<f4", (NUM_KEYPOINTS, 2)),
+}
+
+_session_ids = itertools.count(1)
+
+
+class PoseRecorder:
+    """
+    Appends per-frame detections to a session log from a background thread.
+    record() never blocks the inference loop: if the writer falls behind and
+    the queue is full, the row is dropped and counted.
+    """
+
+    def __init__(self, directory, names, mode=None, max_queue=2048, batch_size=256):
+        self.directory = directory
+        self.names = dict(names)
+        self.mode = mode
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.rows = 0
+        self.dropped = 0
+        os.makedirs(directory, exist_ok=True)
+        self.files = {
+            name: open(os.path.join(directory, f"{name}.bin"), "ab") for name in COLUMNS
+        }
+        self.write_meta()
+        self.thread = threading.Thread(target=self.write_loop, name="pose-recorder", daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def for_session(cls, root, names, mode):
+        """Creates a recorder in a new timestamped directory under root, never an existing one."""
+        os.makedirs(root, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        while True:
+            # Dua sesi di milidetik yang sama (atau dari proses lain) tidak boleh
+            # menambahkan baris ke file yang sama
+            directory = os.path.join(root, f"{stamp}_{os.getpid()}_{next(_session_ids)}_{mode}")
+            try:
+                os.mkdir(directory)
+            except FileExistsError:
+                continue
+            return cls(directory, names, mode)
+
+    def record(self, timestamp, detection):
+        """
+        Args:
+            timestamp (float): Frame time in seconds.
+            detection (PoseDetection or None): Best detection of the frame.
+        """
+        try:
+            self.queue.put_nowait((timestamp, detection))
+        except queue.Full:
+            self.dropped += 1
+
+    def write_loop(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                return
+            batch = [item]
+            # Kumpulkan baris yang sudah antre agar ditulis sekaligus
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self.write_batch(batch)
+                    return
+                batch.append(item)
+            self.write_batch(batch)
+
+    def write_batch(self, batch):
+        n = len(batch)
+        columns = {
+            name: np.zeros((n, *shape), dtype=dtype) for name, (dtype, shape) in COLUMNS.items()
+        }
+        columns["class_id"][:] = -1
+        for i, (timestamp, detection) in enumerate(batch):
+            columns["timestamp"][i] = timestamp
+            if detection is None:
+                continue
+            columns["class_id"][i] = detection.class_id
+            columns["conf"][i] = detection.conf
+            columns["box"][i] = detection.box[:4]
+            if detection.keypoints is not None:
+                keypoints = np.asarray(detection.keypoints)[:NUM_KEYPOINTS]
+                columns["keypoints"][i, :len(keypoints)] = keypoints
+        try:
+            for name, values in columns.items():
+                self.files[name].write(values.tobytes())
+                self.files[name].flush()
+            self.rows += n
+        except OSError as e:
+            logging.error(f"Pose log write failed: {e}")
+
+    def write_meta(self):
+        meta = {
+            "mode": self.mode,
+            "names": {str(k): v for k, v in self.names.items()},
+            "columns": {name: {"dtype": dtype, "shape": list(shape)}
+                        for name, (dtype, shape) in COLUMNS.items()},
+            "rows": self.rows,
+            "dropped": self.dropped,
+        }
+        with open(os.path.join(self.directory, "meta.json"), "w") as f:
+            json.dump(meta, f, indent=2)
+
+    def close(self):
+        """Flushes queued rows, closes the files and finalizes meta.json."""
+        self.queue.put(None)
+        self.thread.join()
+        for f in self.files.values():
+            f.close()
+        self.write_meta()
+        logging.info(f"Pose log saved to {self.directory} ({self.rows} rows, {self.dropped} dropped)")
+
+
+def load_pose_log(directory):
+    """
+    Memory-maps a session log without copying.
+    Returns:
+        tuple: (columns dict of read-only arrays, meta dict)
+    """
+    with open(os.path.join(directory, "meta.json")) as f:
+        meta = json.load(f)
+    meta["names"] = {int(k): v for k, v in meta["names"].items()}
+
+    specs = {}
+    rows = None
+    for name, spec in meta["columns"].items():
+        dtype = np.dtype(spec["dtype"])
+        shape = tuple(spec["shape"])
+        row_bytes = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        size = os.path.getsize(os.path.join(directory, f"{name}.bin"))
+        specs[name] = (dtype, shape)
+        # Jumlah baris lengkap terkecil di semua kolom (aman untuk log yang terpotong)
+        rows = size // row_bytes if rows is None else min(rows, size // row_bytes)
+
+    columns = {}
+    for name, (dtype, shape) in specs.items():
+        if rows == 0:
+            columns[name] = np.zeros((0, *shape), dtype=dtype)
+            continue
+        columns[name] = np.memmap(
+            os.path.join(directory, f"{name}.bin"), dtype=dtype, mode="r", shape=(rows, *shape)
+        )
+    return columns, meta
+
+
+def score_pose_log(directory, mode=None, **thresholds):
+    """Re-scores a recorded session with exercise_counter, no video or model needed."""
+    from exercise_counter import score_events
+    columns, meta = load_pose_log(directory)
+    return score_events(
+        mode or meta["mode"], columns["timestamp"], columns["class_id"],
+        columns["conf"], meta["names"], **thresholds
+    )
+
+
+if __name__ == "__main__":
+    import sys
+    for path in sys.argv[1:]:
+        print(f"{path}: {score_pose_log(path)}")
@@ -0,0 +1,189 @@
+from collections import namedtuple
+import cv2
+import numpy as np
+
+# Hasil deteksi terbaik per frame; keypoints tetap berupa array (K, 2)
+PoseDetection = namedtuple(
+    "PoseDetection", ["class_id", "class_name", "conf", "box", "keypoints"]
+)
+
+SKELETON = np.array([
+    (0, 1),      # head to neck
+    (1, 2), (2, 3), (3, 4), (4, 5),      # left arm
+    (1, 10), (10, 11), (11, 12), (12, 13),  # right arm
+    (1, 6),       # neck to mid-hip
+    (6, 17), (17, 14), (14, 15), (15, 18),  # left leg
+    (6, 19), (19, 7), (7, 8), (8, 9)        # right leg
+], dtype=np.intp)
+NUM_KEYPOINTS = int(SKELETON.max()) + 1
+
+KEYPOINT_COLOR = (0, 0, 255)
+SKELETON_COLOR = (255, 0, 0)
+BOX_COLOR = (0, 255, 0)
+
+
+def to_numpy(values):
+    """Converts a torch tensor (or anything array-like) to a NumPy array."""
+    if hasattr(values, "cpu"):
+        values = values.cpu()
+    if hasattr(values, "numpy"):
+        return values.numpy()
+    return np.asarray(values)
+
+
+def offset_keypoints(keypoints, offset):
+    """Shifts keypoints by (x, y), leaving undetected (0, 0) points at zero."""
+    if offset == (0, 0):
+        return keypoints
+    keypoints = np.asarray(keypoints, dtype=np.float32)
+    visible = (keypoints != 0).any(axis=-1, keepdims=True)
+    return np.where(visible, keypoints + np.asarray(offset, dtype=np.float32), 0)
+
+
+def offset_box(box, offset):
+    if offset == (0, 0):
+        return box
+    return np.asarray(box, dtype=np.float32)[..., :4] + np.tile(np.asarray(offset, dtype=np.float32), 2)
+
+
+def select_best_detection(results, names, threshold, offset=(0, 0)):
+    """
+    Picks the highest-confidence box above threshold across all results,
+    using one argmax per result instead of looping over every box.
+    Args:
+        results: Ultralytics results for one frame.
+        names (dict): Class id to class name mapping of the model.
+        threshold (float): Minimum confidence (0-1).
+        offset (tuple): (x, y) of the crop the results came from, if any.
+    Returns:
+        PoseDetection or None
+    """
+    best = None
+    highest_conf = 0.0
+    for result in results:
+        if result.keypoints is None or result.boxes is None or len(result.boxes) == 0:
+            continue
+        confs = to_numpy(result.boxes.conf)
+        index = int(confs.argmax())
+        conf = float(confs[index])
+        if conf > highest_conf and conf > threshold:
+            highest_conf = conf
+            class_id = int(to_numpy(result.boxes.cls)[index])
+            keypoints = to_numpy(result.keypoints.xy)
+            best = PoseDetection(
+                class_id=class_id,
+                class_name=names[class_id],
+                conf=conf,
+                box=offset_box(to_numpy(result.boxes.xyxy)[index], offset),
+                keypoints=offset_keypoints(keypoints[index], offset) if index < len(keypoints) else None,
+            )
+    return best
+
+
+def select_detections(results, names, threshold, offset=(0, 0)):
+    """
+    Returns every detection above threshold (one per person), for counting
+    several athletes from one camera.
+    Returns:
+        list: PoseDetection objects, highest confidence first.
+    """
+    detections = []
+    for result in results:
+        if result.keypoints is None or result.boxes is None or len(result.boxes) == 0:
+            continue
+        confs = to_numpy(result.boxes.conf)
+        classes = to_numpy(result.boxes.cls).astype(int)
+        boxes = offset_box(to_numpy(result.boxes.xyxy), offset)
+        keypoints = offset_keypoints(to_numpy(result.keypoints.xy), offset)
+        for index in np.flatnonzero(confs > threshold).tolist():
+            detections.append(PoseDetection(
+                class_id=int(classes[index]),
+                class_name=names[int(classes[index])],
+                conf=float(confs[index]),
+                box=boxes[index],
+                keypoints=keypoints[index] if index < len(keypoints) else None,
+            ))
+    detections.sort(key=lambda detection: detection.conf, reverse=True)
+    return detections
+
+
+def draw_poses(frame, keypoints):
+    """
+    Draws keypoints and skeleton for every person in one pass.
+    Args:
+        frame (np.ndarray): BGR image, drawn on in place.
+        keypoints (np.ndarray): (N, K, 2) keypoint coordinates.
+    """
+    points = np.asarray(keypoints)
+    if points.ndim != 3 or points.size == 0:
+        return
+    points = points.astype(np.int32)
+
+    # Titik (0, 0) berarti keypoint tidak terdeteksi
+    visible = (points != 0).any(axis=2)
+    for x, y in points[visible].tolist():
+        cv2.circle(frame, (x, y), 4, KEYPOINT_COLOR, -1)
+
+    edges = SKELETON[(SKELETON < points.shape[1]).all(axis=1)]
+    valid = visible[:, edges[:, 0]] & visible[:, edges[:, 1]]
+    segments = np.stack((points[:, edges[:, 0]], points[:, edges[:, 1]]), axis=2)[valid]
+    if len(segments):
+        cv2.polylines(frame, list(segments), False, SKELETON_COLOR, 2)
+
+
+def draw_detection_box(frame, detection, track_id=None):
+    x1, y1, x2, y2 = (int(v) for v in detection.box[:4])
+    cv2.rectangle(frame, (x1, y1), (x2, y2), BOX_COLOR, 2)
+    label = f"{detection.class_name}: {detection.conf * 100:.1f}%"
+    if track_id is not None:
+        label = f"#{track_id} {label}"
+    cv2.putText(
+        frame, label, (x1, y1 - 10),
+        cv2.FONT_HERSHEY_SIMPLEX, 0.6, BOX_COLOR, 2
+    )
+
+
+def process_detections(frame, results, names, threshold, offset=(0, 0)):
+    """
+    Annotates a copy of the frame and selects the best detection.
+    Results from a cropped region are mapped back with offset=(x, y).
+    Returns:
+        tuple: (annotated_frame, best, raw_best). best is the top detection
+        above threshold (or None); raw_best is the top detection regardless
+        of threshold, for recording.
+    """
+    annotated_frame = frame.copy()
+    for result in results:
+        if result.keypoints is not None:
+            draw_poses(annotated_frame, offset_keypoints(to_numpy(result.keypoints.xy), offset))
+
+    # Box dengan confidence tertinggi sama dengan hasil terbaik di atas threshold
+    raw_best = select_best_detection(results, names, 0.0, offset)
+    best = raw_best if raw_best is not None and raw_best.conf > threshold else None
+    if best is not None:
+        draw_detection_box(annotated_frame, best)
+    return annotated_frame, best, raw_best
+
+
+def annotate_detection(frame, detection):
+    """Annotates a copy of the frame with a single (e.g. tracked) detection."""
+    annotated_frame = frame.copy()
+    if detection is not None:
+        draw_poses(annotated_frame, np.asarray(detection.keypoints)[None])
+        draw_detection_box(annotated_frame, detection)
+    return annotated_frame
+
+
+def annotate_tracks(frame, results, tracks, offset=(0, 0)):
+    """
+    Annotates a copy of the frame with every pose plus a labelled box per track.
+    Args:
+        tracks (dict): Track id to the PoseDetection matched in this frame.
+    """
+    annotated_frame = frame.copy()
+    for result in results:
+        if result.keypoints is not None:
+            draw_poses(annotated_frame, offset_keypoints(to_numpy(result.keypoints.xy), offset))
+    for track_id, detection in tracks.items():
+        draw_detection_box(annotated_frame, detection, track_id)
+    return annotated_frame
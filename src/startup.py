@@ -0,0 +1,162 @@
+"""
+Startup timing and background loading of the detection stack.
+
+main.py imports this module first, shows the window with only Qt and the
+history modules loaded, and then starts ModuleLoader. It imports numpy, cv2,
+torch, ultralytics and the detection modules in the background and then
+warms up the pose model. The CounterTab waits for it when a mode is
+selected before loading has finished.
+
+The startup profile records named marks (seconds since this module was
+imported), the first paint of the main window, and the time and number of
+new modules of each background import. It is logged when loading finishes.
+With STARTUP_PROFILE=1 the per-package breakdown, similar to
+python -X importtime, is logged as well; run the app with -X importtime
+for the full per-module tree.
+"""
+import os
+import sys
+import time
+import logging
+import threading
+from PyQt5.QtCore import QObject, QThread, QEvent, pyqtSignal
+
+START = time.perf_counter()
+
+# Urutan import di background; paket di awal dipakai oleh paket setelahnya
+HEAVY_MODULES = (
+    "numpy", "cv2", "torch", "ultralytics",
+    "inference_backends", "detection_thread", "detection_process",
+)
+
+
+def profile_enabled():
+    return os.getenv("STARTUP_PROFILE", "0").strip().lower() in ("1", "true", "on", "yes")
+
+
+class StartupProfile:
+    """Marks and import timings, in seconds since START."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.marks = []
+        self.imports = []
+
+    def mark(self, name):
+        elapsed = time.perf_counter() - START
+        with self.lock:
+            self.marks.append((name, elapsed))
+        return elapsed
+
+    def timed_import(self, name):
+        """
+        Imports a module and records how long it took and how many modules
+        it pulled in (all of them, as -X importtime counts cumulative time).
+        """
+        before = len(sys.modules)
+        start = time.perf_counter()
+        try:
+            __import__(name)
+        finally:
+            with self.lock:
+                self.imports.append(
+                    (name, time.perf_counter() - start, len(sys.modules) - before)
+                )
+
+    def summary_text(self):
+        with self.lock:
+            marks = list(self.marks)
+        return ", ".join(f"{name} {t * 1000:.0f} ms" for name, t in marks)
+
+    def report(self):
+        """Multi-line report: marks in order, then imports sorted by time."""
+        with self.lock:
+            marks = list(self.marks)
+            imports = sorted(self.imports, key=lambda item: item[1], reverse=True)
+        lines = ["Startup profile (ms since start):"]
+        lines += [f"  {t * 1000:8.1f}  {name}" for name, t in marks]
+        lines.append("Background imports (ms, new modules):")
+        lines += [f"  {t * 1000:8.1f}  {count:5d}  {name}" for name, t, count in imports]
+        return "\n".join(lines)
+
+
+profile = StartupProfile()
+
+
+class FirstPaintWatcher(QObject):
+    """Event filter that marks the first paint of a widget, then removes itself."""
+    painted = pyqtSignal(float)
+
+    def __init__(self, widget):
+        super().__init__(widget)
+        self.widget = widget
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event):
+        if obj is self.widget and event.type() == QEvent.Paint:
+            self.widget.removeEventFilter(self)
+            self.painted.emit(profile.mark("first paint"))
+        return False
+
+
+class ModuleLoader(QThread):
+    """
+    Imports the detection stack in the background, then warms up the model.
+    modulesLoaded is emitted once every module can be imported on the GUI
+    thread without waiting; the model warm-up continues after it.
+    """
+    progress = pyqtSignal(int, str)   # Persen, nama langkah
+    modulesLoaded = pyqtSignal()
+    loadFailed = pyqtSignal(str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.loaded = threading.Event()
+        self.error = None
+
+    def start_once(self):
+        if not self.isRunning() and not self.isFinished():
+            self.start()
+
+    def run(self):
+        steps = len(HEAVY_MODULES) + 1
+        for i, name in enumerate(HEAVY_MODULES):
+            self.progress.emit(int(i * 100 / steps), f"Loading {name}")
+            try:
+                profile.timed_import(name)
+            except Exception as e:
+                # Bukan hanya ImportError: DLL torch (OSError), init CUDA (RuntimeError), dll.
+                self.error = f"Could not load {name}: {e}"
+                logging.error(self.error)
+                self.loaded.set()
+                self.loadFailed.emit(self.error)
+                return
+        profile.mark("modules loaded")
+        self.loaded.set()
+        self.modulesLoaded.emit()
+
+        import detection_process
+        if not detection_process.enabled():
+            # Di mode proses terpisah model dimuat oleh proses anak
+            import inference_backends
+            self.progress.emit(int((steps - 1) * 100 / steps), "Loading pose model")
+            try:
+                inference_backends.get_backend()
+                profile.mark("model ready")
+            except Exception as e:
+                logging.error(f"Inference backend preload failed: {e}")
+        self.progress.emit(100, "Ready")
+        logging.info(f"Startup: {profile.summary_text()}")
+        if profile_enabled():
+            logging.info(profile.report())
+
+
+_loader = None
+
+
+def module_loader():
+    """The process-wide ModuleLoader (created on first call, not started)."""
+    global _loader
+    if _loader is None:
+        _loader = ModuleLoader()
+    return _loader
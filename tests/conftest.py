@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Modul aplikasi ada langsung di src/ dan saling import tanpa package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
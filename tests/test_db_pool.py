@@ -0,0 +1,148 @@
+import threading
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import mysql.connector
+import db
+from db import ConnectionPool
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def execute(self, sql):
+        self.conn.statements.append(sql)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Records session statements, pings and reconnects instead of talking to MySQL."""
+
+    def __init__(self, number):
+        self.number = number
+        self.statements = []
+        self.ping_error = None
+        self.reconnect_error = None
+        self.reconnected = 0
+        self.closed = False
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def ping(self, reconnect=False):
+        if self.ping_error:
+            raise self.ping_error
+
+    def reconnect(self, attempts=1, delay=0):
+        if self.reconnect_error:
+            raise self.reconnect_error
+        self.ping_error = None
+        self.reconnected += 1
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    created = []
+
+    def connect():
+        created.append(FakeConnection(len(created)))
+        return created[-1]
+
+    monkeypatch.setattr(db, "get_connection", connect)
+    return created
+
+
+def test_checkout_times_out_when_pool_is_exhausted(connections):
+    pool = ConnectionPool(size=2, wait_timeout=0.05)
+    first, second = pool.acquire(), pool.acquire()
+
+    with pytest.raises(mysql.connector.errors.PoolError):
+        pool.acquire()
+    stats = pool.stats()
+    assert (stats["open"], stats["in_use"], stats["acquired"]) == (2, 2, 2)
+
+    # Koneksi yang dilepas dari thread lain membangunkan yang sedang menunggu
+    pool.wait_timeout = 5.0
+    threading.Timer(0.05, pool.release, (second,)).start()
+    assert pool.acquire() is second
+    pool.release(first)
+    assert len(connections) == 2
+
+
+def test_idle_connection_is_pinged_and_reused(connections):
+    pool = ConnectionPool(size=1, ping_after=0.0, query_timeout_ms=5000)
+    conn = pool.acquire()
+    pool.release(conn)
+
+    assert pool.acquire() is conn
+    assert conn.reconnected == 0
+    assert conn.statements == ["SET SESSION MAX_EXECUTION_TIME = 5000"]
+    assert pool.stats()["reconnects"] == 0
+
+
+def test_dropped_idle_connection_is_reconnected_with_session_settings(connections):
+    pool = ConnectionPool(size=1, ping_after=0.0, query_timeout_ms=5000)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.ping_error = mysql.connector.errors.OperationalError("MySQL server has gone away")
+
+    assert pool.acquire() is conn
+    assert conn.reconnected == 1
+    assert conn.statements == ["SET SESSION MAX_EXECUTION_TIME = 5000"] * 2
+    assert pool.stats()["reconnects"] == 1
+
+
+def test_failed_reconnect_frees_the_slot(connections):
+    pool = ConnectionPool(size=1, wait_timeout=0.05, ping_after=0.0)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.ping_error = mysql.connector.errors.OperationalError("MySQL server has gone away")
+    conn.reconnect_error = mysql.connector.errors.InterfaceError("Can't connect to MySQL server")
+
+    with pytest.raises(mysql.connector.errors.InterfaceError):
+        pool.acquire()
+    assert conn.closed
+    assert pool.stats()["open"] == 0
+
+    # Slot yang kosong dipakai untuk koneksi baru
+    assert pool.acquire() is connections[1]
+
+
+@pytest.mark.parametrize("error", [
+    mysql.connector.errors.OperationalError("Lost connection to MySQL server during query"),
+    mysql.connector.errors.InterfaceError("2013: Lost connection"),
+])
+def test_connection_error_discards_the_connection(connections, error):
+    pool = ConnectionPool(size=1)
+    with pytest.raises(type(error)):
+        with pool.connection() as conn:
+            raise error
+
+    assert conn.closed
+    stats = pool.stats()
+    assert (stats["open"], stats["idle"], stats["discarded"]) == (0, 0, 1)
+    with pool.connection() as fresh:
+        assert fresh is connections[1]
+
+
+def test_other_errors_keep_the_connection(connections):
+    pool = ConnectionPool(size=1)
+    with pytest.raises(mysql.connector.errors.ProgrammingError):
+        with pool.connection() as conn:
+            raise mysql.connector.errors.ProgrammingError("Unknown column 'x'")
+
+    assert not conn.closed
+    assert pool.stats()["idle"] == 1
+    with pool.connection() as again:
+        assert again is conn
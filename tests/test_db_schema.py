@@ -0,0 +1,73 @@
+from contextlib import contextmanager
+
+import pytest
+
+pytest.importorskip("mysql.connector")
+
+import db
+
+
+class SchemaCursor:
+    """Answers the information_schema queries of ensure_schema for a given table layout."""
+
+    def __init__(self, has_id, has_primary_key):
+        self.has_id = has_id
+        self.has_primary_key = has_primary_key
+        self.statements = []
+
+    def execute(self, sql):
+        self.statements.append(" ".join(sql.split()))
+
+    def fetchone(self):
+        last = self.statements[-1]
+        if "column_name = 'id'" in last:
+            return (int(self.has_id),)
+        if "constraint_type = 'PRIMARY KEY'" in last:
+            return (int(self.has_primary_key),)
+        return (1,)  # history_daily sudah terisi
+
+    def fetchall(self):
+        return [(name,) for name in db.HISTORY_INDEXES]
+
+    def close(self):
+        pass
+
+
+class SchemaPool:
+    """get_pool() stand-in whose single connection hands out the same cursor."""
+
+    def __init__(self, cursor):
+        self.schema_cursor = cursor
+
+    @contextmanager
+    def connection(self):
+        yield self
+
+    def cursor(self):
+        return self.schema_cursor
+
+    def commit(self):
+        pass
+
+
+def alter_statements(monkeypatch, **layout):
+    cursor = SchemaCursor(**layout)
+    monkeypatch.setattr(db, "get_pool", lambda: SchemaPool(cursor))
+    db.ensure_schema()
+    return [sql for sql in cursor.statements if sql.startswith("ALTER")]
+
+
+def test_adds_id_as_primary_key(monkeypatch):
+    assert alter_statements(monkeypatch, has_id=False, has_primary_key=False) == [
+        "ALTER TABLE history ADD COLUMN id INT AUTO_INCREMENT PRIMARY KEY FIRST"
+    ]
+
+
+def test_keeps_existing_primary_key(monkeypatch):
+    assert alter_statements(monkeypatch, has_id=False, has_primary_key=True) == [
+        "ALTER TABLE history ADD COLUMN id INT AUTO_INCREMENT UNIQUE FIRST"
+    ]
+
+
+def test_existing_id_is_left_alone(monkeypatch):
+    assert alter_statements(monkeypatch, has_id=True, has_primary_key=True) == []
@@ -0,0 +1,73 @@
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("ultralytics")
+
+import inference_backends
+from detection_thread import DetectionThread
+from frame_source import ImageSequenceSource, VideoFileSource
+from inference_scheduler import DEFAULT_IMGSZ_LEVELS
+
+FRAMES = 40
+
+
+class FakeModel:
+    names = {0: "squat", 1: "plank"}
+
+
+class FakeBackend:
+    """Records the imgsz of every predict call."""
+    name = "fake"
+    dynamic_imgsz = True
+
+    def __init__(self):
+        self.model = FakeModel()
+        self.calls = []
+
+    def predict(self, frame, imgsz=640):
+        self.calls.append(imgsz)
+        return []
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    for name in ("KEYPOINT_TRACKING_INTERVAL", "PERSON_ROI", "MAX_ATHLETES", "POSE_LOG_DIR"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("PIPELINE_METRICS", "0")
+    # Budget 0 ms: scheduler akan langsung menurunkan imgsz dan melewati frame
+    monkeypatch.setenv("FRAME_BUDGET_MS", "0")
+    fake = FakeBackend()
+    monkeypatch.setattr(inference_backends, "get_backend", lambda: fake)
+    return fake
+
+
+def frame(i):
+    return np.full((48, 64, 3), i * 5 % 256, dtype=np.uint8)
+
+
+def image_sequence(tmp_path):
+    for i in range(FRAMES):
+        cv2.imwrite(str(tmp_path / f"{i:03d}.png"), frame(i))
+    return ImageSequenceSource(str(tmp_path))
+
+
+def video_file(tmp_path):
+    path = str(tmp_path / "session.avi")
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 30.0, (64, 48))
+    for i in range(FRAMES):
+        writer.write(frame(i))
+    writer.release()
+    return VideoFileSource(path)
+
+
+@pytest.mark.parametrize("make_source", [image_sequence, video_file])
+def test_offline_source_sends_every_frame_to_model(backend, tmp_path, make_source):
+    thread = DetectionThread(mode="squat", source=make_source(tmp_path))
+    thread.emit_frames = False
+    thread.enable_start()
+    thread.run()
+
+    assert thread.frame_stats()["consumed"] == FRAMES
+    assert backend.calls == [DEFAULT_IMGSZ_LEVELS[0]] * FRAMES
+    assert thread.scheduler is None
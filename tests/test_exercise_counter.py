@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from exercise_counter import (
+    NO_DETECTION_WARNING, PLANK_WARNING, ExerciseCounter, score_events, score_stream
+)
+
+NAMES = {0: "plank", 1: "squat", 2: "stand"}
+
+
+def random_stream(rng, length):
+    # Kelas dalam blok beberapa frame supaya ada transisi squat/stand yang nyata;
+    # waktu kelipatan 1/8 detik agar penjumlahan float tetap eksak
+    runs = rng.integers(1, 12, size=length)
+    class_ids = np.repeat(rng.integers(-1, 3, size=length), runs)[:length]
+    confidences = rng.choice([0.2, 0.45, 0.55, 0.65, 0.7, 0.75, 0.9, 0.99], size=length)
+    timestamps = np.cumsum(rng.integers(0, 24, size=length)) / 8.0
+    return timestamps, class_ids, confidences
+
+
+def stream_events(timestamps, class_ids, confidences):
+    return [(float(t), int(c), float(p), None) for t, c, p in zip(timestamps, class_ids, confidences)]
+
+
+@pytest.mark.parametrize("mode", ["squat", "plank"])
+@pytest.mark.parametrize("threshold", [0.5, 0.3])
+def test_score_events_matches_state_machine(mode, threshold):
+    rng = np.random.default_rng(11)
+    for _ in range(300):
+        timestamps, class_ids, confidences = random_stream(rng, int(rng.integers(1, 200)))
+        expected = score_stream(mode, stream_events(timestamps, class_ids, confidences),
+                                names=NAMES, threshold=threshold)
+        result = score_events(mode, timestamps, class_ids, confidences, NAMES, threshold=threshold)
+        stopped_at = result.pop("stopped_at", None)
+        assert result == expected
+        assert (stopped_at is None) == ("warning" not in expected)
+
+
+def test_score_events_stops_where_the_counter_warns():
+    rng = np.random.default_rng(3)
+    stops = 0
+    for _ in range(200):
+        timestamps, class_ids, confidences = random_stream(rng, 150)
+        result = score_events("plank", timestamps, class_ids, confidences, NAMES, threshold=0.3)
+        if "stopped_at" not in result:
+            continue
+        stops += 1
+        counter = ExerciseCounter("plank")
+        counter.start(timestamps[0])
+        for index, (t, c, p) in enumerate(zip(timestamps, class_ids, confidences)):
+            cls, conf = (NAMES[int(c)], p * 100) if c >= 0 and p > 0.3 else (None, 0.0)
+            if "warning" in counter.update(t, cls, conf):
+                break
+        assert index == result["stopped_at"]
+    assert stops > 0
+
+
+def pinned(mode, frames):
+    """frames: (detik, kelas atau None, confidence 0-1)"""
+    ids = {name: class_id for class_id, name in NAMES.items()}
+    timestamps = [t for t, _, _ in frames]
+    class_ids = [ids[cls] if cls else -1 for _, cls, _ in frames]
+    confidences = [conf for _, _, conf in frames]
+    result = score_events(mode, timestamps, class_ids, confidences, NAMES)
+    assert score_stream(mode, [(t, cls, conf, None) for t, cls, conf in frames]) == \
+        {key: value for key, value in result.items() if key != "stopped_at"}
+    return result
+
+
+def test_squat_counts_on_return_to_stand():
+    frames = [(0, "stand", 0.9), (1, "squat", 0.8), (2, "squat", 0.9), (3, "stand", 0.9),
+              (4, None, 0.0), (5, "squat", 0.7), (6, "stand", 0.6), (7, "stand", 0.9)]
+    assert pinned("squat", frames) == {"mode": "squat", "squat_count": 2, "squat_duration": 7}
+
+
+def test_squat_from_first_frame_and_low_confidence_ignored():
+    # Status awal "stand", jadi squat di frame pertama tetap terhitung;
+    # deteksi di bawah threshold dianggap tidak ada pose
+    frames = [(0, "squat", 0.9), (1, "stand", 0.4), (2, "stand", 0.8), (3, "squat", 0.45),
+              (4, "stand", 0.9), (5.5, "plank", 0.9), (6.5, "stand", 0.9)]
+    assert pinned("squat", frames) == {"mode": "squat", "squat_count": 1, "squat_duration": 6}
+
+
+def test_squat_stops_after_ten_seconds_without_pose():
+    frames = [(0, "stand", 0.9), (1, "squat", 0.9), (2, "stand", 0.9)]
+    frames += [(t, None, 0.0) for t in range(3, 16)]
+    frames += [(16, "squat", 0.9), (17, "stand", 0.9)]
+    assert pinned("squat", frames) == {
+        "mode": "squat", "squat_count": 1, "squat_duration": 14,
+        "warning": NO_DETECTION_WARNING, "stopped_at": 14
+    }
+
+
+def test_plank_active_time_only_counts_confident_frames():
+    frames = [(t, "plank", 0.9) for t in range(0, 5)]
+    frames += [(t, "plank", 0.6) for t in range(5, 8)]
+    frames += [(t, "plank", 0.85) for t in range(8, 11)]
+    assert pinned("plank", frames) == {
+        "mode": "plank", "plank_total_time": 10, "plank_active_time": 7, "plank_accuracy": 85
+    }
+
+
+def test_plank_accuracy_is_zero_when_last_frame_is_not_plank():
+    frames = [(0, "plank", 0.95), (2, "plank", 0.95), (3, "stand", 0.9), (4.5, None, 0.0)]
+    assert pinned("plank", frames) == {
+        "mode": "plank", "plank_total_time": 4, "plank_active_time": 2, "plank_accuracy": 0
+    }
+
+
+def test_plank_stops_below_fifty_percent():
+    # Hanya bisa terjadi kalau threshold deteksi di bawah 50%
+    timestamps = [0, 1, 2, 3, 4]
+    class_ids = [0, 0, 0, 0, 0]
+    confidences = [0.9, 0.9, 0.45, 0.9, 0.9]
+    assert score_events("plank", timestamps, class_ids, confidences, NAMES, threshold=0.3) == {
+        "mode": "plank", "plank_total_time": 2, "plank_active_time": 1, "plank_accuracy": 45,
+        "warning": PLANK_WARNING, "stopped_at": 2
+    }
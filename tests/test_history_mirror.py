@@ -0,0 +1,55 @@
+import pytest
+
+from history_mirror import HistoryMirror
+
+
+def remote_row(row_id, squat_count=10):
+    return {"id": row_id, "name": f"remote {row_id}", "mode": "squat", "squat_count": squat_count,
+            "squat_duration": 30, "plank_active_time": 0, "plank_total_time": 0,
+            "pc_id": "pc-a", "timestamp": f"2026-01-0{row_id} 08:00:00"}
+
+
+def test_pull_skips_remote_row_that_cannot_be_stored(tmp_path):
+    mirror = HistoryMirror(str(tmp_path / "mirror.db"), pc_id="pc-a")
+    rows = [remote_row(1), remote_row(2, squat_count="ten"), remote_row(3)]
+
+    def fetch_since(after_id, pc_id=None, limit=500):
+        return [row for row in rows if row["id"] > after_id][:limit]
+
+    added, more = mirror.pull(fetch_since)
+    assert (added, more) == (2, False)
+    assert mirror.remote_watermark() == 3
+    names = [row["name"] for row in mirror.fetch_history()[0]]
+    assert names == ["remote 3", "remote 1"]
+    assert [row["sessions"] for row in mirror.fetch_daily_summary()] == [1, 1]
+    # Pull berikutnya tidak mengulang baris yang rusak
+    assert mirror.pull(fetch_since) == (0, False)
+    mirror.close()
+
+
+def session(name, squat_count, minute):
+    return {"name": name, "mode": "squat", "squat_count": squat_count, "squat_duration": 30,
+            "pc_id": "pc-a", "timestamp": f"2026-01-01 08:{minute:02d}:00"}
+
+
+@pytest.mark.parametrize("sort", ["metric", "name", "timestamp"])
+@pytest.mark.parametrize("descending", [False, True])
+def test_keyset_pages_break_ties_by_id(tmp_path, sort, descending):
+    mirror = HistoryMirror(str(tmp_path / "mirror.db"), pc_id="pc-a")
+    # Banyak nilai kembar di setiap kolom sort, termasuk di batas halaman
+    counts = [5, 3, 5, 5, 8, 3, 5, 8, 5, 1]
+    mirror.insert_history_batch([
+        session(f"athlete {i % 3}", count, minute=i // 4) for i, count in enumerate(counts)
+    ])
+    rows = mirror.select("SELECT * FROM history")
+    value = {"metric": "squat_count", "name": "name", "timestamp": "timestamp"}[sort]
+    expected = sorted(((row[value], row["id"]) for row in rows), reverse=descending)
+
+    seen, after = [], None
+    while True:
+        page, after = mirror.fetch_history(limit=3, after=after, sort=sort, descending=descending)
+        seen += [(row[value], row["id"]) for row in page]
+        if after is None:
+            break
+    assert seen == expected
+    mirror.close()
@@ -0,0 +1,129 @@
+import pytest
+
+from history_mirror import HistoryMirror
+from history_queue import HistoryWriter
+
+
+class FakeRemote:
+    """insert_batch stand-in: rejects the whole batch if it holds a poison record."""
+
+    def __init__(self):
+        self.rows = []
+        self.error = None
+
+    def insert_batch(self, records):
+        if self.error:
+            raise self.error
+        if any(record["name"] == "poison" for record in records):
+            raise ValueError("Incorrect integer value for column 'squat_count'")
+        self.rows.extend(records)
+
+
+def session(name, minute):
+    return {"name": name, "mode": "squat", "squat_count": 10, "squat_duration": 30,
+            "pc_id": "pc-a", "timestamp": f"2026-01-01 08:{minute:02d}:00"}
+
+
+@pytest.fixture
+def mirror(tmp_path):
+    mirror = HistoryMirror(str(tmp_path / "mirror.db"), pc_id="pc-a")
+    yield mirror
+    mirror.close()
+
+
+def attempts(mirror):
+    return {row["name"]: (row["synced"], row["attempts"])
+            for row in mirror.select("SELECT name, synced, attempts FROM history")}
+
+
+def test_poison_record_does_not_block_good_ones(mirror):
+    remote = FakeRemote()
+    writer = HistoryWriter(mirror, insert_batch=remote.insert_batch, max_attempts=3)
+    mirror.append(session("poison", 0))
+    for i in range(1, 4):
+        mirror.append(session(f"good {i}", i))
+
+    writer.flush_batch()
+    assert [row["name"] for row in remote.rows] == ["good 1", "good 2", "good 3"]
+    assert len(mirror) == 1
+    assert attempts(mirror)["poison"] == (0, 1)
+    assert writer.backoff > 0
+
+    # Record berikutnya juga tidak tertahan oleh record yang rusak
+    mirror.append(session("good 4", 4))
+    writer.flush_batch()
+    assert remote.rows[-1]["name"] == "good 4"
+
+    writer.flush_batch()
+    assert attempts(mirror)["poison"] == (-1, 3)
+    assert len(mirror) == 0
+    assert mirror.peek(10) == []
+    assert writer.parked == 1
+    assert len(remote.rows) == 4
+
+
+def test_transient_error_keeps_batch_without_counting_attempts(mirror):
+    remote = FakeRemote()
+    remote.error = ConnectionError("MySQL server has gone away")
+    writer = HistoryWriter(mirror, insert_batch=remote.insert_batch, max_attempts=1)
+    mirror.append(session("good 1", 1))
+
+    writer.flush_batch()
+    assert attempts(mirror)["good 1"] == (0, 0)
+    assert writer.backoff > 0
+
+    remote.error = None
+    writer.flush_batch()
+    assert len(mirror) == 0
+    assert writer.backoff == 0
+
+
+def test_schema_error_does_not_park_records(mirror):
+    remote = FakeRemote()
+    remote.error = RuntimeError("Table 'workout.history' doesn't exist")
+    writer = HistoryWriter(mirror, insert_batch=remote.insert_batch, max_attempts=1)
+    mirror.append(session("good 1", 1))
+    mirror.append(session("good 2", 2))
+
+    for _ in range(3):
+        writer.flush_batch()
+    assert attempts(mirror) == {"good 1": (0, 0), "good 2": (0, 0)}
+    assert writer.parked == 0
+    assert len(mirror) == 2
+
+
+def test_parked_records_are_requeued(mirror):
+    remote = FakeRemote()
+    writer = HistoryWriter(mirror, insert_batch=remote.insert_batch, max_attempts=1)
+    mirror.append(session("poison", 0))
+    writer.flush_batch()
+    assert attempts(mirror)["poison"] == (-1, 1)
+
+    assert mirror.requeue_parked() == 1
+    assert attempts(mirror)["poison"] == (0, 0)
+    assert len(mirror) == 1
+
+
+def test_unacknowledged_push_is_not_sent_twice(mirror, tmp_path):
+    remote = HistoryMirror(str(tmp_path / "remote.db"), pc_id="pc-a")
+    lost_ack = [True]
+
+    def insert_batch(records):
+        remote.insert_history_batch(records)
+        if lost_ack:
+            lost_ack.pop()
+            raise ConnectionError("Lost connection to MySQL server during query")
+
+    writer = HistoryWriter(mirror, insert_batch=insert_batch,
+                           pull=lambda: mirror.pull(remote.fetch_history_since))
+    writer.running = True
+    mirror.append(session("good 1", 1))
+    writer.unconfirmed = False
+    writer.flush_batch()
+    assert writer.unconfirmed and len(mirror) == 1
+
+    writer.sync_once()
+    assert len(mirror) == 0
+    assert [row["name"] for row in remote.fetch_history()[0]] == ["good 1"]
+    assert [row["sessions"] for row in mirror.fetch_daily_summary()] == [1]
+    remote.close()
@@ -0,0 +1,52 @@
+import pytest
+
+pytest.importorskip("ultralytics")
+
+import inference_backends
+from frame_source import SyntheticSource
+from inference_scheduler import DEFAULT_IMGSZ_LEVELS
+from multi_camera import MultiCameraDetectionThread
+
+FRAMES = 40
+
+
+class FakeModel:
+    names = {0: "squat", 1: "plank"}
+
+
+class EmptyResult:
+    keypoints = None
+    boxes = None
+
+
+class FakeBackend:
+    """Records the batch size and imgsz of every predict_batch call."""
+    name = "fake"
+    dynamic_imgsz = True
+
+    def __init__(self):
+        self.model = FakeModel()
+        self.calls = []
+
+    def predict_batch(self, frames, imgsz=640):
+        self.calls.append((len(frames), imgsz))
+        return [EmptyResult() for _ in frames]
+
+
+def test_offline_sources_run_batched_at_fixed_imgsz(monkeypatch):
+    monkeypatch.setenv("PIPELINE_METRICS", "0")
+    # Budget 0 ms: scheduler akan langsung menurunkan imgsz
+    monkeypatch.setenv("FRAME_BUDGET_MS", "0")
+    backend = FakeBackend()
+    monkeypatch.setattr(inference_backends, "get_backend", lambda: backend)
+
+    worker = MultiCameraDetectionThread()
+    worker.emit_frames = False
+    for _ in range(2):
+        worker.add_source(SyntheticSource(count=FRAMES, size=(48, 64)))
+    worker.enable_start()
+    worker.run()
+
+    assert worker.scheduler is None
+    assert sum(size for size, _ in backend.calls) == 2 * FRAMES
+    assert {imgsz for _, imgsz in backend.calls} == {DEFAULT_IMGSZ_LEVELS[0]}
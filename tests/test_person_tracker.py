@@ -0,0 +1,96 @@
+import numpy as np
+
+from exercise_counter import MIN_ATHLETE_SECONDS, MultiPersonCounter, session_athletes
+from person_tracker import PersonTracker
+from pose_postprocess import PoseDetection
+
+
+def person(x1, y1, x2, y2, name="stand", conf=0.9):
+    return PoseDetection(2, name, conf, np.array([x1, y1, x2, y2, conf]), np.zeros((17, 2)))
+
+
+def test_ids_follow_people_who_cross():
+    tracker = PersonTracker()
+    ids = {}
+    # A (dekat kamera, kotak besar) jalan ke kanan, B (jauh, kotak kecil) ke kiri
+    for frame in range(30):
+        a = person(20 + 15 * frame, 40, 220 + 15 * frame, 440)
+        b = person(500 - 15 * frame, 120, 600 - 15 * frame, 320)
+        # Urutan deteksi dari model tidak tetap
+        detections = [b, a] if frame % 2 else [a, b]
+        matched, lost = tracker.update(frame / 30, detections)
+        assert lost == []
+        assert len(matched) == 2
+        for track_id, detection in matched.items():
+            ids.setdefault(track_id, set()).add("a" if detection is a else "b")
+    assert ids == {1: {"a"}, 2: {"b"}}
+    assert tracker.stats() == {"active_tracks": 2, "tracks_created": 2, "tracks_dropped": 0}
+
+
+def test_short_gap_keeps_the_id_long_gap_expires_it():
+    tracker = PersonTracker(lost_after=2.0)
+    box = (100, 50, 300, 450)
+    assert list(tracker.update(0.0, [person(*box)])[0]) == [1]
+
+    # Hilang 1,5 detik (mis. tertutup orang lain), lalu terlihat lagi
+    for t in np.arange(0.1, 1.5, 0.1):
+        assert tracker.update(t, []) == ({}, [])
+    assert list(tracker.update(1.5, [person(*box)])[0]) == [1]
+
+    lost_at = None
+    for t in np.arange(1.6, 4.0, 0.1):
+        matched, lost = tracker.update(t, [])
+        if lost:
+            lost_at = t
+            break
+    assert lost == [1] and lost_at > 3.5
+    assert tracker.stats() == {"active_tracks": 0, "tracks_created": 1, "tracks_dropped": 1}
+
+    # Kembali setelah kedaluwarsa: id baru
+    assert list(tracker.update(4.0, [person(*box)])[0]) == [2]
+
+
+def test_extra_people_beyond_max_tracks_are_ignored():
+    tracker = PersonTracker(max_tracks=2)
+    people = [person(200 * i, 0, 200 * i + 150, 400) for i in range(3)]
+    matched, _ = tracker.update(0.0, people)
+    assert sorted(matched) == [1, 2]
+    assert tracker.stats()["active_tracks"] == 2
+
+
+def test_bystander_is_not_saved():
+    tracker = PersonTracker()
+    counter = MultiPersonCounter("squat")
+    counter.start(0.0)
+    data = None
+    for frame in range(12 * 10):
+        t = frame / 10
+        athlete_class = "squat" if frame % 20 < 10 else "stand"
+        detections = [person(100, 50, 300, 450, athlete_class)]
+        if 20 <= frame < 50:
+            # Orang lewat di belakang selama 3 detik, sempat terbaca "squat"
+            walker = 700 - 10 * (frame - 20)
+            detections.append(person(walker, 150, walker + 80, 350,
+                                     "squat" if frame < 35 else "stand"))
+        matched, lost = tracker.update(t, detections)
+        data = counter.update(t, {track_id: (d.class_name, d.conf * 100)
+                                  for track_id, d in matched.items()}, lost)
+
+    athletes = {athlete["track_id"]: athlete for athlete in data["athletes"]}
+    assert sorted(athletes) == [1, 2]
+    assert athletes[2]["squat_count"] == 1 and athletes[2]["squat_duration"] < MIN_ATHLETE_SECONDS
+    assert athletes[1]["squat_count"] == 6
+    assert [athlete["track_id"] for athlete in session_athletes(data["athletes"])] == [1]
+
+
+def test_session_athletes_thresholds():
+    athletes = [
+        {"track_id": 1, "mode": "squat", "squat_count": 4, "squat_duration": 30},
+        {"track_id": 2, "mode": "squat", "squat_count": 1, "squat_duration": 3},
+        {"track_id": 3, "mode": "squat", "squat_count": 0, "squat_duration": 40},
+        {"track_id": 4, "mode": "squat", "squat_count": 1, "squat_duration": 5},
+        {"track_id": 5, "mode": "plank", "plank_total_time": 20, "plank_active_time": 0},
+        {"track_id": 6, "mode": "plank", "plank_total_time": 20, "plank_active_time": 12},
+    ]
+    assert [a["track_id"] for a in session_athletes(athletes)] == [1, 4, 6]
+    assert [a["track_id"] for a in session_athletes(athletes, min_seconds=10)] == [1, 6]
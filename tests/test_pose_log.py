@@ -0,0 +1,46 @@
+import itertools
+import os
+from datetime import datetime
+
+import numpy as np
+
+import pose_log
+from pose_log import PoseRecorder, load_pose_log
+from pose_postprocess import PoseDetection
+
+NAMES = {0: "plank", 1: "squat", 2: "stand"}
+
+
+class FrozenClock:
+    @staticmethod
+    def now():
+        return datetime(2026, 1, 1, 8, 0, 0, 123000)
+
+
+def detection(class_id):
+    return PoseDetection(class_id, NAMES[class_id], 0.9, np.array([0, 0, 10, 10, 0.9]), None)
+
+
+def test_sessions_started_together_get_separate_logs(tmp_path, monkeypatch):
+    monkeypatch.setattr(pose_log, "datetime", FrozenClock)
+    monkeypatch.setattr(pose_log, "_session_ids", itertools.count(1))
+    # Direktori dari proses lain dengan nama yang sama sudah ada
+    taken = tmp_path / f"20260101_080000_123_{os.getpid()}_1_squat"
+    taken.mkdir()
+    (taken / "timestamp.bin").write_bytes(b"\0" * 8)
+
+    first = PoseRecorder.for_session(str(tmp_path), NAMES, "squat")
+    second = PoseRecorder.for_session(str(tmp_path), NAMES, "squat")
+    for i in range(3):
+        first.record(float(i), detection(1))
+    second.record(0.0, detection(2))
+    first.close()
+    second.close()
+
+    assert len({str(taken), first.directory, second.directory}) == 3
+    columns, meta = load_pose_log(first.directory)
+    assert columns["timestamp"].tolist() == [0.0, 1.0, 2.0]
+    assert columns["class_id"].tolist() == [1, 1, 1]
+    columns, meta = load_pose_log(second.directory)
+    assert columns["class_id"].tolist() == [2]
+    assert meta["mode"] == "squat"
@@ -0,0 +1,17 @@
+import startup
+
+
+def test_loader_reports_non_import_errors(monkeypatch):
+    def timed_import(name):
+        raise OSError("[WinError 126] Error loading c10.dll")
+
+    monkeypatch.setattr(startup, "HEAVY_MODULES", ("torch",))
+    monkeypatch.setattr(startup.profile, "timed_import", timed_import)
+    loader = startup.ModuleLoader()
+    failures = []
+    loader.loadFailed.connect(failures.append)
+    loader.run()
+
+    assert loader.loaded.is_set()
+    assert loader.error == "Could not load torch: [WinError 126] Error loading c10.dll"
+    assert failures == [loader.error]